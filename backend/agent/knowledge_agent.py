@@ -1448,10 +1448,13 @@ IMPORTANT: Only work with the user's input. Do not expand, research, or add exte
                 except Exception as e:
                     errors.append(f"Error removing {file_path}: {str(e)}")
             
-            # Handle new files
+            # Handle new files (ChromaDB indexing is batched below)
+            added_nodes = []
             for file_path in changes["new_files"]:
                 try:
-                    await self._add_file_to_graph(file_path)
+                    node = await self._add_file_to_graph(file_path, index=False)
+                    if node:
+                        added_nodes.append(node)
                     actions_taken.append(f"Added new file: {file_path}")
                 except Exception as e:
                     errors.append(f"Error adding {file_path}: {str(e)}")
@@ -1459,11 +1462,16 @@ IMPORTANT: Only work with the user's input. Do not expand, research, or add exte
             # Handle modified files
             for file_path in changes["modified_files"]:
                 try:
-                    await self._update_file_in_graph(file_path)
+                    node = await self._update_file_in_graph(file_path, index=False)
+                    if node:
+                        added_nodes.append(node)
                     actions_taken.append(f"Updated modified file: {file_path}")
                 except Exception as e:
                     errors.append(f"Error updating {file_path}: {str(e)}")
             
+            if added_nodes:
+                await self.enhanced_graph._add_nodes_to_chroma(added_nodes)
+            
             # Resolve wiki-links after all changes
             if changes["total_changes"] > 0:
                 try:
@@ -1499,62 +1507,11 @@ IMPORTANT: Only work with the user's input. Do not expand, research, or add exte
     async def _remove_file_from_graph(self, file_path: str):
         """Remove a file from the knowledge graph"""
         # Find the node for this file
-        node_to_remove = None
-        for node in self.enhanced_graph.nodes_by_id.values():
-            if node.file_path == file_path:
-                node_to_remove = node
-                break
+        node_to_remove = self.enhanced_graph.nodes_by_id.get(self.enhanced_graph.path_to_id.get(file_path))
         
         if node_to_remove:
-            node_id = node_to_remove.id
-            
-            # Remove from ChromaDB first
-            try:
-                if self.enhanced_graph.collection:
-                    self.enhanced_graph.collection.delete(ids=[node_id])
-                    print(f"   🗑️  Removed from ChromaDB: {node_id}")
-            except Exception as e:
-                print(f"   ⚠️  Error removing from ChromaDB: {e}")
-            
-            # Remove from indexes
-            self.enhanced_graph.nodes_by_id.pop(node_id, None)
-            self.enhanced_graph.title_to_id.pop(node_to_remove.title, None)
-            
-            # Remove from category index
-            if node_to_remove.category in self.enhanced_graph.category_index:
-                self.enhanced_graph.category_index[node_to_remove.category].discard(node_id)
-                # Clean up empty category sets
-                if not self.enhanced_graph.category_index[node_to_remove.category]:
-                    del self.enhanced_graph.category_index[node_to_remove.category]
-            
-            # Remove from tag index
-            for tag in node_to_remove.tags:
-                if tag in self.enhanced_graph.tag_index:
-                    self.enhanced_graph.tag_index[tag].discard(node_id)
-                    # Clean up empty tag sets
-                    if not self.enhanced_graph.tag_index[tag]:
-                        del self.enhanced_graph.tag_index[tag]
-            
-            # Remove from hierarchy index
-            if node_to_remove.parent_id:
-                if node_to_remove.parent_id in self.enhanced_graph.hierarchy_index:
-                    self.enhanced_graph.hierarchy_index[node_to_remove.parent_id].discard(node_id)
-                    # Clean up empty hierarchy sets
-                    if not self.enhanced_graph.hierarchy_index[node_to_remove.parent_id]:
-                        del self.enhanced_graph.hierarchy_index[node_to_remove.parent_id]
-            
-            # Remove edges
-            edges_to_remove = []
-            for edge_id, edge in self.enhanced_graph.edges_by_id.items():
-                if edge.source_id == node_id or edge.target_id == node_id:
-                    edges_to_remove.append(edge_id)
-            
-            for edge_id in edges_to_remove:
-                self.enhanced_graph.edges_by_id.pop(edge_id, None)
-            
-            # Remove from NetworkX graph
-            if node_id in self.enhanced_graph.graph:
-                self.enhanced_graph.graph.remove_node(node_id)
+            # Remove the node, its edges and its ChromaDB entry
+            await self.enhanced_graph._remove_node(node_to_remove.id)
             
             # Remove from hash tracker
             self.enhanced_graph.hash_tracker.remove_note_mapping(file_path)
@@ -1563,27 +1520,29 @@ IMPORTANT: Only work with the user's input. Do not expand, research, or add exte
         else:
             print(f"   ⚠️  No node found for file: {file_path}")
     
-    async def _add_file_to_graph(self, file_path: str):
-        """Add a new file to the knowledge graph"""
+    async def _add_file_to_graph(self, file_path: str, index: bool = True):
+        """Add a new file to the knowledge graph (index=False leaves the ChromaDB add to the caller)"""
         file_path_obj = Path(file_path)
         
         # Parse the file
         parsed_note = self.enhanced_graph.markdown_parser.parse_file(file_path_obj)
         
         # Add to graph
-        await self.enhanced_graph._add_parsed_note(file_path_obj, parsed_note)
+        node = await self.enhanced_graph._add_parsed_note(file_path_obj, parsed_note, index=index)
         
         print(f"   ✨ Added node: {parsed_note.title}")
+        return node
     
-    async def _update_file_in_graph(self, file_path: str):
+    async def _update_file_in_graph(self, file_path: str, index: bool = True):
         """Update an existing file in the knowledge graph"""
         # Remove the old version
         await self._remove_file_from_graph(file_path)
         
         # Add the new version
-        await self._add_file_to_graph(file_path)
+        node = await self._add_file_to_graph(file_path, index=index)
         
         print(f"   🔄 Updated node for: {file_path}") 
+        return node
 
     async def _clean_all_storage(self) -> Dict[str, Any]:
         """
@@ -1619,13 +1578,7 @@ IMPORTANT: Only work with the user's input. Do not expand, research, or add exte
                 old_nodes_count = len(self.enhanced_graph.nodes_by_id)
                 old_edges_count = len(self.enhanced_graph.edges_by_id)
                 
-                self.enhanced_graph.nodes_by_id.clear()
-                self.enhanced_graph.edges_by_id.clear()
-                self.enhanced_graph.title_to_id.clear()
-                self.enhanced_graph.category_index.clear()
-                self.enhanced_graph.tag_index.clear()
-                self.enhanced_graph.hierarchy_index.clear()
-                self.enhanced_graph.graph.clear()
+                self.enhanced_graph._clear_indexes()
                 
                 cleanup_results["actions_taken"].append(f"Cleared {old_nodes_count} nodes and {old_edges_count} edges from graph indexes")
             except Exception as e:
@@ -1636,20 +1589,26 @@ IMPORTANT: Only work with the user's input. Do not expand, research, or add exte
             try:
                 cache_stats_before = self.enhanced_graph.hash_tracker.get_cache_stats()
                 self.enhanced_graph.hash_tracker.clear_cache()
+                if _knowledge_tools_manager.notes_manager:
+                    _knowledge_tools_manager.notes_manager.clear_scan_cache()
                 cleanup_results["actions_taken"].append(f"Cleared hash cache ({cache_stats_before['total_cached_items']} items, {cache_stats_before['total_mapped_notes']} mappings)")
             except Exception as e:
                 cleanup_results["errors"].append(f"Error clearing hash cache: {str(e)}")
             
-            # 4. Remove saved graph file
-            print("   🗑️  Removing saved graph file...")
+            # 4. Remove saved graph files
+            print("   🗑️  Removing saved graph files...")
             try:
                 import os
-                graph_path = os.path.join(self.enhanced_graph.knowledge_base_path, "enhanced_graph.json")
-                if os.path.exists(graph_path):
-                    os.remove(graph_path)
-                    cleanup_results["actions_taken"].append("Removed saved graph file")
+                import shutil
+                graph_path = self.enhanced_graph.graph_file
+                graph_dir = self.enhanced_graph.graph_dir
+                if os.path.exists(graph_path) or os.path.isdir(graph_dir):
+                    if os.path.exists(graph_path):
+                        os.remove(graph_path)
+                    shutil.rmtree(graph_dir, ignore_errors=True)
+                    cleanup_results["actions_taken"].append("Removed saved graph files")
                 else:
-                    cleanup_results["actions_taken"].append("No saved graph file to remove")
+                    cleanup_results["actions_taken"].append("No saved graph files to remove")
             except Exception as e:
                 cleanup_results["errors"].append(f"Error removing saved graph file: {str(e)}")
             
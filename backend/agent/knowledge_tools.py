@@ -1315,6 +1315,7 @@ def clear_cache(confirm: str = "no") -> str:
         
         # Clear the cache
         hash_tracker.clear_cache()
+        _knowledge_tools_manager.notes_manager.clear_scan_cache()
         
         return json.dumps({
             "success": True,
@@ -1351,6 +1352,7 @@ def rebuild_cache() -> str:
         
         # Reinitialize notes manager to rebuild cache
         notes_manager = _knowledge_tools_manager.notes_manager
+        notes_manager.clear_scan_cache()
         notes_manager.notes_index.clear()
         await notes_manager._scan_existing_notes()
         
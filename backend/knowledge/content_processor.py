@@ -1,5 +1,6 @@
 import re
 import asyncio
+from collections import Counter
 from typing import Dict, Any, List, Optional
 import httpx
 from bs4 import BeautifulSoup
@@ -194,14 +195,10 @@ class ContentProcessor:
         }
         
         # Count word frequencies
-        word_freq = {}
-        for word in words:
-            if word not in stop_words and len(word) > 3:
-                word_freq[word] = word_freq.get(word, 0) + 1
-        
-        # Sort by frequency and return top phrases
-        sorted_words = sorted(word_freq.items(), key=lambda x: x[1], reverse=True)
-        return [word for word, freq in sorted_words[:10] if freq > 1]
+        word_freq = Counter(word for word in words if word not in stop_words and len(word) > 3)
+        
+        # Return the most frequent words that appear more than once
+        return [word for word, freq in word_freq.most_common(10) if freq > 1]
     
     async def _extract_questions(self, text: str) -> List[str]:
         """Extract questions from text"""
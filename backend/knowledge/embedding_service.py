@@ -111,6 +111,7 @@ class EmbeddingService:
     def __init__(self, provider_type: str = "sentence_transformer", **kwargs):
         self.provider_type = provider_type
         self.provider = self._create_provider(provider_type, **kwargs)
+        self._provider_info: Optional[dict] = None
     
     def _create_provider(self, provider_type: str, **kwargs) -> EmbeddingProvider:
         """Create the appropriate embedding provider"""
@@ -141,6 +142,13 @@ class EmbeddingService:
     
     def get_provider_info(self) -> dict:
         """Get information about the current provider"""
+        # The provider is fixed for the service's lifetime, so describe it once
+        if self._provider_info is None:
+            self._provider_info = self._describe_provider()
+        return self._provider_info
+    
+    def _describe_provider(self) -> dict:
+        """Build the provider description returned by get_provider_info"""
         if isinstance(self.provider, OpenAIEmbeddingProvider):
             return {
                 "type": "openai",
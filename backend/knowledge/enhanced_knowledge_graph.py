@@ -4,22 +4,28 @@ Implements the hybrid approach: declarative links + compiled index
 """
 
 import networkx as nx
+import numpy as np
 import chromadb
 from chromadb.utils import embedding_functions
 from typing import List, Dict, Any, Optional, Set, Tuple
-import json
+import orjson
 import os
 from datetime import datetime
 import uuid
 import asyncio
 from pathlib import Path
 import pickle
-from dataclasses import dataclass, asdict
+from dataclasses import dataclass, asdict, replace
 import re
+import heapq
+import logging
+from collections import Counter, OrderedDict, deque
+from itertools import chain, islice
+from operator import attrgetter
 
 from models.chat_models import SearchResult
 from .embedding_service import create_embedding_service, EmbeddingService
-from .hash_utils import calculate_content_hash, get_hash_tracker, HashTracker
+from .hash_utils import calculate_content_hash, get_hash_tracker, HashTracker, write_json_atomic, shard_of
 from .markdown_parser import (
     get_markdown_parser, 
     MarkdownParser, 
@@ -29,6 +35,33 @@ from .markdown_parser import (
     WikiLink
 )
 
+logger = logging.getLogger(__name__)
+
+_SENT_RE = re.compile(r'[.!?]+\s+')
+_SNIPPET_SENT_RE = re.compile(r'[.!?]+')
+_WORD_RE = re.compile(r'\w+')
+
+def _iter_sentences(text: str):
+    """Lazily split text on sentence boundaries (same pieces as _SENT_RE.split)"""
+    start = 0
+    for match in _SENT_RE.finditer(text):
+        yield text[start:match.start()]
+        start = match.end()
+    yield text[start:]
+
+def _to_timestamp(value: Any) -> float:
+    """Best-effort POSIX timestamp for a node's created/updated value (0.0 if unparseable)"""
+    try:
+        if not isinstance(value, datetime):
+            value = datetime.fromisoformat(str(value))
+        return value.timestamp()
+    except (ValueError, OverflowError, OSError):
+        return 0.0
+
+def _trigrams(text: str) -> Set[str]:
+    """Distinct 3-character substrings of text"""
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
 @dataclass
 class GraphNode:
     """Enhanced node representation with PKM metadata"""
@@ -44,6 +77,8 @@ class GraphNode:
     file_path: str = ""
     parent_id: str = ""
     children_ids: List[str] = None
+    file_mtime_ns: int = 0  # Stat of file_path when this node was built from it
+    file_size: int = 0
     
     def __post_init__(self):
         if self.children_ids is None:
@@ -102,6 +137,18 @@ class TextChunk:
 class EnhancedKnowledgeGraph:
     """Enhanced knowledge graph with PKM features"""
     
+    # Nodes per ChromaDB add (and embedding request) when indexing many notes at once
+    CHROMA_BATCH_SIZE = 100
+    
+    # Seconds the index worker waits for more single-note adds to join a batch
+    INDEX_BATCH_WAIT = 0.1
+    
+    # Entries kept in each of the query embedding and semantic search result LRU caches
+    QUERY_CACHE_SIZE = 1024
+    
+    # Rows of the int8 vector matrix dequantized at a time during a semantic query
+    VECTOR_BLOCK_ROWS = 4096
+    
     def __init__(self, knowledge_base_path: str = None):
         self.knowledge_base_path = knowledge_base_path or os.getenv("KNOWLEDGE_BASE_PATH", "./.knowledge_base")
         self.notes_directory = os.getenv("NOTES_DIRECTORY", "./notes")
@@ -113,14 +160,61 @@ class EnhancedKnowledgeGraph:
         self.embedding_service = None
         self.hash_tracker = get_hash_tracker()
         self.markdown_parser = get_markdown_parser()
+        self.dirty = False  # Set when in-memory changes haven't been written by _save_graph yet
+        self._dirty_shards: Set[str] = set()  # snapshot shards holding those changes
+        self.flush_interval = 5.0  # Seconds between saves of a dirty graph
+        self._flush_task: Optional[asyncio.Task] = None
+        self._save_lock = asyncio.Lock()
+        # Bounds embedding work in flight (provider requests, local model runs)
+        self._embed_sem = asyncio.Semaphore(int(os.getenv("EMBED_CONCURRENCY", "8")))
+        # Single-note adds wait here for _index_worker; the bound applies backpressure to writers
+        self._index_queue: asyncio.Queue = asyncio.Queue(maxsize=256)
+        self._index_task: Optional[asyncio.Task] = None
+        # Repeated queries skip the embedding request, and the search itself while the graph is unchanged
+        self._query_embeddings: OrderedDict = OrderedDict()  # query -> embedding
+        self._search_cache: OrderedDict = OrderedDict()  # (query, limit) -> (generation, results)
         
         # PKM-specific indexes
         self.nodes_by_id: Dict[str, GraphNode] = {}
         self.edges_by_id: Dict[str, GraphEdge] = {}
         self.title_to_id: Dict[str, str] = {}
+        self.path_to_id: Dict[str, str] = {}  # file_path -> node_id
         self.category_index: Dict[str, Set[str]] = {}
         self.tag_index: Dict[str, Set[str]] = {}
         self.hierarchy_index: Dict[str, Set[str]] = {}  # parent_id -> children_ids
+        self._hierarchy_depth: Optional[int] = None  # cached _calculate_hierarchy_depth, None when stale
+        self._title_lower: Dict[str, str] = {}  # node_id -> lowercased title
+        self._tag_lower: Dict[str, str] = {}  # tag -> lowercased tag
+        self._title_trigrams: Dict[str, Set[str]] = {}  # trigram of lowercased title -> node_ids
+        
+        # Column-oriented node attributes for graph-wide reports; free slots hold -inf
+        self._node_slot: Dict[str, int] = {}  # node_id -> slot
+        self._slot_node_ids: List[Optional[str]] = []  # slot -> node_id
+        self._slot_updated_at = np.full(64, -np.inf)  # slot -> updated_at timestamp
+        self._free_slots: List[int] = []
+        # In-memory copy of each node's embedding for semantic search; ChromaDB persists them.
+        # Stored as int8 codes with a per-row scale: embedding ~= code * scale
+        self._slot_vectors: Optional[np.ndarray] = None  # slot -> int8 codes, allocated on first use
+        self._slot_vector_scales = np.zeros(64, dtype=np.float32)  # slot -> dequantization scale
+        self._slot_sq_norms = np.zeros(64, dtype=np.float32)  # slot -> squared L2 norm of its embedding
+        self._slot_has_vector = np.zeros(64, dtype=bool)
+        self._vector_count = 0
+        
+        # Incrementally maintained edge statistics
+        self._degree: Counter = Counter()  # node_id -> number of incident edges
+        self._rel_type_counts: Counter = Counter()  # relation_type -> number of edges
+        self.edges_by_node: Dict[str, Set[str]] = {}  # node_id -> ids of edges touching it
+        self._in_edges: Dict[str, Set[str]] = {}  # target_id -> ids of edges pointing at it
+        self._orphans: Set[str] = set()  # node_ids with no incoming edges
+        self._broken_edges: Set[str] = set()  # edge_ids whose target is not a known node
+        
+        # Bumped on every node, edge or embedding change; keys the get_graph_data and search caches
+        self._generation = 0
+        self._graph_data_cache: Optional[Tuple[int, Dict[str, Any]]] = None
+        
+        # Wiki-links that did not resolve, so new or renamed notes can pick them up
+        self.unresolved_by_title: Dict[str, Set[str]] = {}  # link target -> node_ids linking to it
+        self._unresolved_by_node: Dict[str, Set[str]] = {}  # node_id -> its unresolved link targets
         
         self.initialized = False
         
@@ -160,69 +254,170 @@ class EnhancedKnowledgeGraph:
                     metadata={"embedding_provider": "sentence_transformer", "model": provider_info['model']}
                 )
         
+        # Bind the provider-specific ChromaDB query once; the provider never changes within a session
+        if provider_info['type'] == 'openai':
+            self._query_chroma = self._query_chroma_openai
+        else:
+            self._query_chroma = self._query_chroma_st
+        
         # Load existing graph
         await self._load_graph()
         
         # Scan notes directory for wiki-links and relationships
         await self._scan_notes_directory()
         
+        # Fill in embeddings for nodes the scan didn't (re-)embed
+        await self._load_vectors()
+        
+        # Mutators only mark the graph dirty; save it in the background
+        self._flush_task = asyncio.create_task(self._periodic_flush())
+        self._index_task = asyncio.create_task(self._index_worker())
+        
         self.initialized = True
         print(f"📊 Enhanced Knowledge Graph initialized with {len(self.nodes_by_id)} nodes and {len(self.edges_by_id)} edges")
         
+    @property
+    def graph_dir(self) -> str:
+        """
+        Directory holding the graph snapshot shards (enhanced_graph/00.json .. ff.json).
+        
+        Nodes are sharded by ID and edges by source ID, so a save only rewrites
+        the shards touched since the previous one.
+        """
+        return os.path.join(self.knowledge_base_path, "enhanced_graph")
+    
+    @property
+    def graph_file(self) -> str:
+        """Single-file graph snapshot from before sharding"""
+        return os.path.join(self.knowledge_base_path, "enhanced_graph.json")
+    
     async def _load_graph(self):
         """Load existing graph from disk"""
-        graph_path = os.path.join(self.knowledge_base_path, "enhanced_graph.json")
-        if os.path.exists(graph_path):
-            try:
-                with open(graph_path, 'r') as f:
-                    data = json.load(f)
-                    
-                # Load nodes
-                for node_data in data.get('nodes', []):
-                    node = GraphNode(**node_data)
-                    self.nodes_by_id[node.id] = node
-                    self.title_to_id[node.title] = node.id
-                    self._update_indexes(node)
-                
-                # Load edges
-                for edge_data in data.get('edges', []):
-                    edge = GraphEdge(**edge_data)
-                    self.edges_by_id[f"{edge.source_id}-{edge.target_id}-{edge.relation_type}"] = edge
-                
-                # Rebuild NetworkX graph
-                self._rebuild_networkx_graph()
-                
-            except Exception as e:
-                print(f"Error loading enhanced graph: {e}")
-                self.graph = nx.MultiDiGraph()
-                
-    async def _save_graph(self):
-        """Save graph to disk"""
-        graph_path = os.path.join(self.knowledge_base_path, "enhanced_graph.json")
         try:
-            data = {
-                'nodes': [asdict(node) for node in self.nodes_by_id.values()],
-                'edges': [asdict(edge) for edge in self.edges_by_id.values()],
-                'metadata': {
-                    'saved_at': datetime.now().isoformat(),
-                    'total_nodes': len(self.nodes_by_id),
-                    'total_edges': len(self.edges_by_id)
-                }
-            }
+            data = await asyncio.to_thread(self._read_graph_snapshot, self.graph_dir, self.graph_file)
+            
+            # Load nodes
+            for node_data in data['nodes'].values():
+                node = GraphNode(**node_data)
+                self.nodes_by_id[node.id] = node
+                self.title_to_id[node.title] = node.id
+                self._update_indexes(node)
+            
+            # Load edges
+            for edge_id, edge_data in data['edges'].items():
+                self._add_edge(edge_id, GraphEdge(**edge_data))
+            
+            # Rebuild NetworkX graph
+            self._rebuild_networkx_graph()
+            
+            # What was just read is already on disk, unless it came from a
+            # pre-sharding snapshot, which the next save migrates into shards
+            self._dirty_shards.clear()
+            if data['legacy']:
+                self._dirty_shards.update(f"{i:02x}" for i in range(256))
+                self.dirty = True
             
-            with open(graph_path, 'w') as f:
-                json.dump(data, f, indent=2)
-                
         except Exception as e:
-            print(f"Error saving enhanced graph: {e}")
+            print(f"Error loading enhanced graph: {e}")
+            self.graph = nx.MultiDiGraph()
+    
+    @staticmethod
+    def _read_graph_snapshot(graph_dir: str, graph_file: str) -> Dict[str, Any]:
+        """Read and parse the saved graph shards (run in a worker thread)"""
+        nodes: Dict[str, Dict[str, Any]] = {}
+        edges: Dict[str, Dict[str, Any]] = {}
+        
+        def merge(data: Dict[str, Any]):
+            for node_data in data.get('nodes', []):
+                nodes[node_data['id']] = node_data
+            for edge_data in data.get('edges', []):
+                edges[f"{edge_data['source_id']}-{edge_data['target_id']}-{edge_data['relation_type']}"] = edge_data
+        
+        # A leftover single-file snapshot is read first so shards written since take precedence
+        legacy = os.path.exists(graph_file)
+        if legacy:
+            with open(graph_file, 'rb') as f:
+                merge(orjson.loads(f.read()))
+        
+        try:
+            shard_files = [name for name in os.listdir(graph_dir) if name.endswith('.json')]
+        except FileNotFoundError:
+            shard_files = []
+        for name in shard_files:
+            try:
+                with open(os.path.join(graph_dir, name), 'rb') as f:
+                    merge(orjson.loads(f.read()))
+            except (orjson.JSONDecodeError, IOError) as e:
+                print(f"Warning: Could not load graph shard {name}: {e}")
+        
+        return {'nodes': nodes, 'edges': edges, 'legacy': legacy}
+    
+    async def _save_graph(self):
+        """Save the graph shards changed since the last save (written off the event loop)"""
+        async with self._save_lock:
+            self.dirty = False
+            dirty_shards, self._dirty_shards = self._dirty_shards, set()
+            if not dirty_shards:
+                return
+            try:
+                # Serialize on the loop so the worker thread sees a consistent graph
+                shards = {shard: {'nodes': [], 'edges': []} for shard in dirty_shards}
+                for node_id, node in self.nodes_by_id.items():
+                    shard = shards.get(shard_of(node_id))
+                    if shard is not None:
+                        shard['nodes'].append(asdict(node))
+                for edge in self.edges_by_id.values():
+                    shard = shards.get(shard_of(edge.source_id))
+                    if shard is not None:
+                        shard['edges'].append(asdict(edge))
+                
+                await asyncio.to_thread(self._write_graph_shards, self.graph_dir, self.graph_file, shards)
+                    
+            except Exception as e:
+                print(f"Error saving enhanced graph: {e}")
+                # Keep the unsaved shards for the next attempt
+                self._dirty_shards |= dirty_shards
+                self.dirty = True
+    
+    @staticmethod
+    def _write_graph_shards(graph_dir: str, graph_file: str, shards: Dict[str, Dict[str, Any]]):
+        """Write snapshot shards, removing ones left empty (run in a worker thread)"""
+        for shard, data in shards.items():
+            shard_file = os.path.join(graph_dir, shard + '.json')
+            if data['nodes'] or data['edges']:
+                write_json_atomic(shard_file, data)
+            elif os.path.exists(shard_file):
+                os.remove(shard_file)
+        
+        # Everything from a pre-sharding snapshot now lives in the shards
+        if len(shards) == 256 and os.path.exists(graph_file):
+            os.remove(graph_file)
+    
+    def _touch_node(self, node: GraphNode):
+        """Mark a node changed in place (outside the indexes) for the next save"""
+        self._dirty_shards.add(shard_of(node.id))
+        self.dirty = True
+    
+    async def _periodic_flush(self):
+        """Save the graph at most once per flush_interval while it has unsaved changes"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            if self.dirty:
+                await self._save_graph()
+    
+    async def flush(self):
+        """Finish queued ChromaDB indexing, then save the graph if it has unsaved changes"""
+        await self._index_queue.join()
+        if self.dirty:
+            await self._save_graph()
             
     def _rebuild_networkx_graph(self):
         """Rebuild the NetworkX graph from our indexes (without content for efficiency)"""
         self.graph.clear()
         
         # Add nodes (excluding content for memory efficiency)
-        for node in self.nodes_by_id.values():
-            self.graph.add_node(node.id, **{
+        self.graph.add_nodes_from(
+            (node.id, {
                 'title': node.title,
                 'category': node.category,
                 'tags': node.tags,
@@ -232,20 +427,30 @@ class EnhancedKnowledgeGraph:
                 'updated_at': node.updated_at,
                 'metadata': node.metadata
             })
+            for node in self.nodes_by_id.values()
+        )
         
-        # Add edges
-        for edge in self.edges_by_id.values():
-            self.graph.add_edge(
-                edge.source_id,
-                edge.target_id,
-                relation_type=edge.relation_type,
-                weight=edge.weight,
-                metadata=edge.metadata,
-                created_at=edge.created_at
-            )
+        # Add edges. Two notes can be linked by several relation types, so this stays a
+        # multigraph; keying edges by relation type makes each one graph[u][v][type].
+        self.graph.add_edges_from(
+            (edge.source_id, edge.target_id, edge.relation_type, {
+                'relation_type': edge.relation_type,
+                'weight': edge.weight,
+                'metadata': edge.metadata,
+                'created_at': edge.created_at
+            })
+            for edge in self.edges_by_id.values()
+        )
     
     def _update_indexes(self, node: GraphNode):
         """Update various indexes for fast lookups"""
+        self._generation += 1
+        self._dirty_shards.add(shard_of(node.id))
+        
+        # File path index
+        if node.file_path:
+            self.path_to_id[node.file_path] = node.id
+        
         # Category index
         if node.category not in self.category_index:
             self.category_index[node.category] = set()
@@ -255,13 +460,229 @@ class EnhancedKnowledgeGraph:
         for tag in node.tags:
             if tag not in self.tag_index:
                 self.tag_index[tag] = set()
+                self._tag_lower[tag] = tag.lower()
             self.tag_index[tag].add(node.id)
         
-        # Hierarchy index
+        # Hierarchy index; any node change can add or remove a root
+        self._hierarchy_depth = None
         if node.parent_id:
             if node.parent_id not in self.hierarchy_index:
                 self.hierarchy_index[node.parent_id] = set()
             self.hierarchy_index[node.parent_id].add(node.id)
+        
+        # Lowercased title and its trigrams for search
+        previous_title = self._title_lower.get(node.id)
+        if previous_title is not None:
+            self._remove_title_trigrams(node.id, previous_title)
+        title_lower = node.title.lower()
+        self._title_lower[node.id] = title_lower
+        for trigram in _trigrams(title_lower):
+            self._title_trigrams.setdefault(trigram, set()).add(node.id)
+        
+        # Column-oriented attributes
+        self._assign_slot(node)
+        
+        # Incoming links now resolve to this node
+        incoming = self._in_edges.get(node.id)
+        if incoming:
+            self._broken_edges.difference_update(incoming)
+            self._orphans.discard(node.id)
+        else:
+            self._orphans.add(node.id)
+    
+    def _assign_slot(self, node: GraphNode):
+        """Store a node's report attributes in its column slot, allocating one if needed"""
+        slot = self._node_slot.get(node.id)
+        if slot is None:
+            if self._free_slots:
+                slot = self._free_slots.pop()
+                self._slot_node_ids[slot] = node.id
+            else:
+                slot = len(self._slot_node_ids)
+                self._slot_node_ids.append(node.id)
+                if slot >= len(self._slot_updated_at):
+                    self._grow_slots(max(64, int(len(self._slot_updated_at) * 1.5)))
+            self._node_slot[node.id] = slot
+        
+        self._slot_updated_at[slot] = _to_timestamp(node.updated_at)
+    
+    def _grow_slots(self, capacity: int):
+        """Grow the column arrays to capacity slots"""
+        used = len(self._slot_updated_at)
+        
+        grown = np.full(capacity, -np.inf)
+        grown[:used] = self._slot_updated_at
+        self._slot_updated_at = grown
+        
+        grown = np.zeros(capacity, dtype=np.float32)
+        grown[:used] = self._slot_sq_norms
+        self._slot_sq_norms = grown
+        
+        grown = np.zeros(capacity, dtype=np.float32)
+        grown[:used] = self._slot_vector_scales
+        self._slot_vector_scales = grown
+        
+        grown = np.zeros(capacity, dtype=bool)
+        grown[:used] = self._slot_has_vector
+        self._slot_has_vector = grown
+        
+        if self._slot_vectors is not None:
+            grown = np.zeros((capacity, self._slot_vectors.shape[1]), dtype=np.int8)
+            grown[:used] = self._slot_vectors
+            self._slot_vectors = grown
+    
+    def _release_slot(self, node_id: str):
+        """Free a node's column slot for reuse"""
+        slot = self._node_slot.pop(node_id, None)
+        if slot is not None:
+            self._slot_node_ids[slot] = None
+            self._slot_updated_at[slot] = -np.inf
+            if self._slot_has_vector[slot]:
+                self._slot_has_vector[slot] = False
+                self._vector_count -= 1
+            self._free_slots.append(slot)
+    
+    def _set_vectors(self, node_ids: List[str], embeddings: List[List[float]]):
+        """Quantize embeddings into the in-memory vector columns of their nodes' slots"""
+        if not embeddings:
+            return
+        self._generation += 1
+        vectors = np.asarray(embeddings, dtype=np.float32)
+        if self._slot_vectors is None:
+            self._slot_vectors = np.zeros((len(self._slot_updated_at), vectors.shape[1]), dtype=np.int8)
+        elif vectors.shape[1] != self._slot_vectors.shape[1]:
+            print(f"Error indexing embeddings: expected dimension {self._slot_vectors.shape[1]}, got {vectors.shape[1]}")
+            return
+        
+        # Symmetric per-row scale: the largest component maps to +/-127
+        scales = np.abs(vectors).max(axis=1) / 127.0
+        scales[scales == 0] = 1.0
+        codes = np.round(vectors / scales[:, None]).astype(np.int8)
+        sq_norms = np.einsum('ij,ij->i', vectors, vectors)
+        
+        for node_id, code, scale, sq_norm in zip(node_ids, codes, scales, sq_norms):
+            slot = self._node_slot.get(node_id)
+            if slot is None:
+                continue
+            self._slot_vectors[slot] = code
+            self._slot_vector_scales[slot] = scale
+            self._slot_sq_norms[slot] = sq_norm
+            if not self._slot_has_vector[slot]:
+                self._slot_has_vector[slot] = True
+                self._vector_count += 1
+    
+    async def _load_vectors(self):
+        """Load embeddings from ChromaDB for nodes that don't have one in memory yet"""
+        missing = [node_id for node_id, slot in self._node_slot.items() if not self._slot_has_vector[slot]]
+        if not missing or self.collection is None:
+            return
+        try:
+            stored = await asyncio.to_thread(self.collection.get, ids=missing, include=['embeddings'])
+            self._set_vectors(stored['ids'], stored['embeddings'])
+        except Exception as e:
+            print(f"Error loading embeddings from ChromaDB: {e}")
+    
+    def _nearest_vectors(self, query_embedding: List[float], n_results: int) -> Dict[str, Any]:
+        """Nearest nodes by squared L2 distance (ChromaDB's default space), in its query response shape"""
+        query = np.asarray(query_embedding, dtype=np.float32)
+        used = len(self._slot_node_ids)
+        k = min(n_results, self._vector_count)
+        if k <= 0:
+            return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+        
+        # Dequantize a block at a time so only the int8 matrix is streamed in full
+        dots = np.empty(used, dtype=np.float32)
+        for start in range(0, used, self.VECTOR_BLOCK_ROWS):
+            end = min(start + self.VECTOR_BLOCK_ROWS, used)
+            dots[start:end] = self._slot_vectors[start:end].astype(np.float32) @ query
+        dots *= self._slot_vector_scales[:used]
+        
+        distances = self._slot_sq_norms[:used] - 2.0 * dots + query @ query
+        distances[~self._slot_has_vector[:used]] = np.inf
+        top = np.argpartition(distances, k - 1)[:k]
+        top = top[np.argsort(distances[top])]
+        
+        nodes = [self.nodes_by_id[self._slot_node_ids[slot]] for slot in top]
+        return {
+            'ids': [[node.id for node in nodes]],
+            'documents': [[node.content for node in nodes]],
+            'metadatas': [[self._chroma_metadata(node) for node in nodes]],
+            'distances': [distances[top].tolist()]
+        }
+    
+    def _remove_from_indexes(self, node: GraphNode):
+        """Remove a node from the lookup indexes (inverse of _update_indexes)"""
+        self._generation += 1
+        self._dirty_shards.add(shard_of(node.id))
+        
+        # File path index
+        if self.path_to_id.get(node.file_path) == node.id:
+            del self.path_to_id[node.file_path]
+        
+        # Category index
+        if node.category in self.category_index:
+            self.category_index[node.category].discard(node.id)
+            if not self.category_index[node.category]:
+                del self.category_index[node.category]
+        
+        # Tag index
+        for tag in node.tags:
+            if tag in self.tag_index:
+                self.tag_index[tag].discard(node.id)
+                if not self.tag_index[tag]:
+                    del self.tag_index[tag]
+                    self._tag_lower.pop(tag, None)
+        
+        # Hierarchy index
+        self._hierarchy_depth = None
+        if node.parent_id in self.hierarchy_index:
+            self.hierarchy_index[node.parent_id].discard(node.id)
+            if not self.hierarchy_index[node.parent_id]:
+                del self.hierarchy_index[node.parent_id]
+        
+        title_lower = self._title_lower.pop(node.id, None)
+        if title_lower is not None:
+            self._remove_title_trigrams(node.id, title_lower)
+        
+        self._release_slot(node.id)
+        
+        # Links still pointing at this node are now broken
+        self._orphans.discard(node.id)
+        incoming = self._in_edges.get(node.id)
+        if incoming:
+            self._broken_edges.update(incoming)
+    
+    def _remove_title_trigrams(self, node_id: str, title_lower: str):
+        """Remove a node from the title trigram postings"""
+        for trigram in _trigrams(title_lower):
+            postings = self._title_trigrams.get(trigram)
+            if postings is not None:
+                postings.discard(node_id)
+                if not postings:
+                    del self._title_trigrams[trigram]
+    
+    def _title_candidates(self, query_lower: str) -> Set[str]:
+        """
+        Node IDs whose lowercased title may contain query_lower.
+        
+        Intersects the trigram postings of the query (smallest first); queries
+        shorter than three characters fall back to every node. Callers still
+        verify the substring match.
+        """
+        query_trigrams = _trigrams(query_lower)
+        if not query_trigrams:
+            return set(self._title_lower)
+        
+        postings = sorted(
+            (self._title_trigrams.get(trigram, set()) for trigram in query_trigrams),
+            key=len
+        )
+        candidates = set(postings[0])
+        for posting in postings[1:]:
+            if not candidates:
+                break
+            candidates &= posting
+        return candidates
     
     async def _scan_notes_directory(self):
         """Scan notes directory for wiki-links and relationships"""
@@ -271,19 +692,22 @@ class EnhancedKnowledgeGraph:
         
         print(f"🔍 Scanning notes directory: {notes_path}")
         
-        # First pass: parse all notes
-        parsed_notes = []
-        for md_file in notes_path.rglob("*.md"):
-            try:
-                parsed_note = self.markdown_parser.parse_file(md_file)
-                parsed_notes.append((md_file, parsed_note))
-                print(f"   📄 Parsed: {parsed_note.title}")
-            except Exception as e:
-                print(f"   ❌ Error parsing {md_file}: {e}")
+        # First pass: parse all notes off the event loop (across worker processes for large vaults)
+        parsed_notes = await self.markdown_parser.parse_files_async(list(notes_path.rglob("*.md")))
+        for md_file, parsed_note in parsed_notes:
+            print(f"   📄 Parsed: {parsed_note.title}")
         
-        # Second pass: add nodes and relationships
+        # Second pass: add nodes and relationships, then index them in ChromaDB in batches
+        nodes = []
         for md_file, parsed_note in parsed_notes:
-            await self._add_parsed_note(md_file, parsed_note)
+            # A note edited (or hashed differently) since the last save loaded under an older ID
+            stale_id = self.path_to_id.get(str(md_file))
+            if stale_id is not None and stale_id != parsed_note.id:
+                await self._remove_node(stale_id)
+            node = await self._add_parsed_note(md_file, parsed_note, index=False)
+            if node:
+                nodes.append(node)
+        await self._add_nodes_to_chroma(nodes)
         
         # Third pass: resolve wiki-links to actual node IDs
         await self._resolve_wiki_links()
@@ -293,9 +717,12 @@ class EnhancedKnowledgeGraph:
         
         print(f"✅ Scanned {len(parsed_notes)} notes")
     
-    async def _add_parsed_note(self, file_path: Path, parsed_note: ParsedNote):
-        """Add a parsed note to the graph"""
+    async def _add_parsed_note(self, file_path: Path, parsed_note: ParsedNote, index: bool = True) -> Optional[GraphNode]:
+        """Add a parsed note to the graph (index=False leaves the ChromaDB add to the caller)"""
         try:
+            # One timestamp stamps the node defaults and all of its relationship edges
+            now = datetime.now().isoformat()
+            
             # Create graph node
             node = GraphNode(
                 id=parsed_note.id,
@@ -305,12 +732,17 @@ class EnhancedKnowledgeGraph:
                 tags=parsed_note.tags,
                 metadata=parsed_note.metadata,
                 content_hash=parsed_note.content_hash,
-                created_at=parsed_note.metadata.get('created', datetime.now().isoformat()),
-                updated_at=parsed_note.metadata.get('updated', datetime.now().isoformat()),
+                created_at=parsed_note.metadata.get('created', now),
+                updated_at=parsed_note.metadata.get('updated', now),
                 file_path=str(file_path),
                 parent_id=parsed_note.parent,
                 children_ids=parsed_note.children
             )
+            try:
+                stat = os.stat(file_path)
+                node.file_mtime_ns, node.file_size = stat.st_mtime_ns, stat.st_size
+            except OSError:
+                pass
             
             # Add to indexes
             self.nodes_by_id[node.id] = node
@@ -318,67 +750,296 @@ class EnhancedKnowledgeGraph:
             self._update_indexes(node)
             
             # Add to ChromaDB for semantic search
-            await self._add_to_chroma(node)
+            if index:
+                await self._add_to_chroma(node)
             
             # Add relationships as edges
-            for relationship in parsed_note.relationships:
-                await self._add_relationship(relationship)
+            self._add_relationships(parsed_note.relationships, created_at=now)
+            
+            return node
                 
         except Exception as e:
             print(f"Error adding parsed note {parsed_note.title}: {e}")
+            return None
     
-    async def _add_to_chroma(self, node: GraphNode):
-        """Add node to ChromaDB for semantic search"""
+    async def _remove_node(self, node_id: str):
+        """Remove a node, its edges and its ChromaDB entry"""
+        node = self.nodes_by_id.pop(node_id, None)
+        if node:
+            if self.title_to_id.get(node.title) == node_id:
+                del self.title_to_id[node.title]
+            self._remove_from_indexes(node)
+        
+        # Wiki-links from other notes into this one no longer resolve
+        for edge_id in self._in_edges.get(node_id, ()):
+            edge = self.edges_by_id[edge_id]
+            if edge.relation_type == 'wiki_link' and edge.source_id != node_id:
+                target = edge.metadata.get('target') or (node.title if node else None)
+                if target:
+                    self._register_unresolved(edge.source_id, target)
+        self._clear_unresolved(node_id)
+        
+        # Remove all edges involving this node
+        for edge_id in list(self.edges_by_node.get(node_id, ())):
+            self._remove_edge(edge_id)
+        
+        if node_id in self.graph:
+            self.graph.remove_node(node_id)
+        
+        # Remove from ChromaDB, off the event loop like the adds
         try:
-            # Prepare metadata for ChromaDB
-            chroma_metadata = {
-                'title': node.title,
-                'category': node.category,
-                'tags': ', '.join(node.tags),
-                'content_hash': node.content_hash,
-                'created_at': node.created_at,
-                'updated_at': node.updated_at,
-                'file_path': node.file_path
-            }
+            if self.collection:
+                await asyncio.to_thread(self.collection.delete, ids=[node_id])
+        except Exception as e:
+            print(f"   ⚠️  Error removing from ChromaDB: {e}")
+    
+    async def _replace_node(self, old_node: GraphNode, parsed_note: ParsedNote):
+        """
+        Swap in an edited version of a note without a graph-wide link resolution.
+        
+        Node IDs derive from the note's content, so an edit produces a new ID.
+        When the title is unchanged, edges aimed at the old ID are re-pointed
+        at the new one. Otherwise links into the old note become unresolved
+        and are picked up again only if they match the new title.
+        """
+        old_id = old_node.id
+        incoming = []
+        if parsed_note.title == old_node.title:
+            incoming = [
+                self.edges_by_id[edge_id] for edge_id in self._in_edges.get(old_id, ())
+                if self.edges_by_id[edge_id].source_id != old_id
+            ]
+        
+        await self._remove_node(old_id)
+        await self._add_parsed_note(Path(old_node.file_path), parsed_note)
+        node = self.nodes_by_id.get(parsed_note.id)
+        if node is None:
+            return
+        
+        for edge in incoming:
+            self._add_edge(f"{edge.source_id}-{node.id}-{edge.relation_type}", replace(edge, target_id=node.id))
+            if edge.relation_type == 'wiki_link':
+                self._unregister_unresolved(edge.source_id, edge.metadata.get('target') or node.title)
+        
+        self._resolve_wiki_links_for(node.id, parsed_note.wiki_links)
+    
+    def _chroma_metadata(self, node: GraphNode) -> Dict[str, Any]:
+        """Prepare node metadata for ChromaDB"""
+        return {
+            'title': node.title,
+            'category': node.category,
+            'tags': ', '.join(node.tags),
+            'content_hash': node.content_hash,
+            'created_at': node.created_at,
+            'updated_at': node.updated_at,
+            'file_path': node.file_path
+        }
+    
+    async def _add_to_chroma(self, node: GraphNode):
+        """Queue a node for ChromaDB indexing (flush() waits for the queue to drain)"""
+        if self._index_task is None:
+            await self._add_batch_to_chroma([node])
+            return
+        await self._index_queue.put(node)
+    
+    async def _index_worker(self):
+        """
+        Index queued nodes in ChromaDB a batch at a time.
+        
+        Each batch's ChromaDB add runs in the background while the next batch
+        is embedded, so the two stages overlap.
+        """
+        storing: Optional[asyncio.Task] = None
+        while True:
+            batch = [await self._index_queue.get()]
+            # Give a burst of adds a moment to share one embedding request
+            await asyncio.sleep(self.INDEX_BATCH_WAIT)
+            while len(batch) < self.CHROMA_BATCH_SIZE:
+                try:
+                    batch.append(self._index_queue.get_nowait())
+                except asyncio.QueueEmpty:
+                    break
             
-            # Check if we need to generate embeddings manually
-            provider_info = self.embedding_service.get_provider_info()
-            if provider_info['type'] == 'openai':
-                embedding = await self.embedding_service.embed_text(node.content)
-                self.collection.add(
-                    documents=[node.content],
-                    metadatas=[chroma_metadata],
-                    ids=[node.id],
-                    embeddings=[embedding]
-                )
-            else:
-                self.collection.add(
-                    documents=[node.content],
-                    metadatas=[chroma_metadata],
-                    ids=[node.id]
-                )
-                
+            nodes = list({node.id: node for node in batch}.values())
+            embeddings = None
+            try:
+                embeddings = await self._embed_nodes(nodes)
+            except Exception as e:
+                print(f"Error adding to ChromaDB: {e}")
+            
+            if storing is not None:
+                await storing
+            storing = asyncio.create_task(self._store_indexed(batch, nodes, embeddings))
+    
+    async def _store_indexed(self, batch: List[GraphNode], nodes: List[GraphNode], embeddings: Optional[List[List[float]]]):
+        """Add an embedded batch from the index queue to ChromaDB and mark its entries done"""
+        try:
+            if embeddings is not None:
+                # Skip nodes removed or replaced while they were being embedded
+                kept = [i for i, node in enumerate(nodes) if self.nodes_by_id.get(node.id) is node]
+                await self._store_batch([nodes[i] for i in kept], [embeddings[i] for i in kept])
         except Exception as e:
             print(f"Error adding to ChromaDB: {e}")
+        finally:
+            for _ in batch:
+                self._index_queue.task_done()
     
-    async def _add_relationship(self, relationship: Relationship):
-        """Add a relationship as an edge"""
-        edge_id = f"{relationship.source_id}-{relationship.target_id}-{relationship.relation_type.value}"
-        
-        edge = GraphEdge(
-            source_id=relationship.source_id,
-            target_id=relationship.target_id,
-            relation_type=relationship.relation_type.value,
-            metadata=relationship.metadata,
-            weight=1.0
+    async def _add_nodes_to_chroma(self, nodes: List[GraphNode]):
+        """Add many nodes to ChromaDB, one add (and embedding request) per CHROMA_BATCH_SIZE nodes"""
+        # Identical notes share an ID, and ChromaDB rejects duplicate IDs within one add
+        nodes = list({node.id: node for node in nodes}.values())
+        # Batches are independent, so their embedding requests can be in flight together
+        await asyncio.gather(*(
+            self._add_batch_to_chroma(nodes[start:start + self.CHROMA_BATCH_SIZE])
+            for start in range(0, len(nodes), self.CHROMA_BATCH_SIZE)
+        ))
+    
+    async def _add_batch_to_chroma(self, nodes: List[GraphNode]):
+        """Embed a batch of nodes and add them to ChromaDB and the in-memory vectors"""
+        if not nodes:
+            return
+        if self.collection is None:
+            print("Error adding to ChromaDB: knowledge graph not initialized")
+            return
+        try:
+            embeddings = await self._embed_nodes(nodes)
+            await self._store_batch(nodes, embeddings)
+        except Exception as e:
+            print(f"Error adding to ChromaDB: {e}")
+    
+    async def _embed_nodes(self, nodes: List[GraphNode]) -> List[List[float]]:
+        """Embed the content of a batch of nodes"""
+        async with self._embed_sem:
+            return await self.embedding_service.embed_texts([node.content for node in nodes])
+    
+    async def _store_batch(self, nodes: List[GraphNode], embeddings: List[List[float]]):
+        """Add embedded nodes to the in-memory vectors and ChromaDB"""
+        if not nodes:
+            return
+        self._set_vectors([node.id for node in nodes], embeddings)
+        await asyncio.to_thread(
+            self.collection.add,
+            documents=[node.content for node in nodes],
+            metadatas=[self._chroma_metadata(node) for node in nodes],
+            ids=[node.id for node in nodes],
+            embeddings=embeddings
         )
+    
+    def _add_relationships(self, relationships: List[Relationship], created_at: str = ""):
+        """Add relationships as edges, all stamped with one created_at (defaults to now)"""
+        created_at = created_at or datetime.now().isoformat()
+        for relationship in relationships:
+            relation_type = relationship.relation_type.value
+            self._add_edge(
+                f"{relationship.source_id}-{relationship.target_id}-{relation_type}",
+                GraphEdge(
+                    source_id=relationship.source_id,
+                    target_id=relationship.target_id,
+                    relation_type=relation_type,
+                    metadata=relationship.metadata,
+                    weight=1.0,
+                    created_at=created_at
+                )
+            )
+    
+    def _add_edge(self, edge_id: str, edge: GraphEdge):
+        """Add or replace an edge, keeping the edge statistics in sync"""
+        self._generation += 1
+        self._dirty_shards.add(shard_of(edge.source_id))
+        previous = self.edges_by_id.get(edge_id)
+        if previous is not None:
+            self._untrack_edge(edge_id, previous)
         
         self.edges_by_id[edge_id] = edge
+        self._degree[edge.source_id] += 1
+        self._degree[edge.target_id] += 1
+        self._rel_type_counts[edge.relation_type] += 1
+        
+        self.edges_by_node.setdefault(edge.source_id, set()).add(edge_id)
+        self.edges_by_node.setdefault(edge.target_id, set()).add(edge_id)
+        
+        self._in_edges.setdefault(edge.target_id, set()).add(edge_id)
+        if edge.target_id in self.nodes_by_id:
+            self._orphans.discard(edge.target_id)
+        else:
+            self._broken_edges.add(edge_id)
+    
+    def _remove_edge(self, edge_id: str) -> Optional[GraphEdge]:
+        """Remove an edge, keeping the edge statistics in sync"""
+        edge = self.edges_by_id.pop(edge_id, None)
+        if edge is not None:
+            self._untrack_edge(edge_id, edge)
+        return edge
+    
+    def _untrack_edge(self, edge_id: str, edge: GraphEdge):
+        """Remove an edge's contribution from the edge statistics"""
+        self._generation += 1
+        self._dirty_shards.add(shard_of(edge.source_id))
+        for node_id in (edge.source_id, edge.target_id):
+            remaining = self._degree.get(node_id, 0) - 1
+            if remaining > 0:
+                self._degree[node_id] = remaining
+            else:
+                self._degree.pop(node_id, None)
+        
+        self._rel_type_counts[edge.relation_type] -= 1
+        if self._rel_type_counts[edge.relation_type] <= 0:
+            del self._rel_type_counts[edge.relation_type]
+        
+        for node_id in (edge.source_id, edge.target_id):
+            touching = self.edges_by_node.get(node_id)
+            if touching is not None:
+                touching.discard(edge_id)
+                if not touching:
+                    del self.edges_by_node[node_id]
+        
+        self._broken_edges.discard(edge_id)
+        incoming = self._in_edges.get(edge.target_id)
+        if incoming is not None:
+            incoming.discard(edge_id)
+            if not incoming:
+                del self._in_edges[edge.target_id]
+                if edge.target_id in self.nodes_by_id:
+                    self._orphans.add(edge.target_id)
+    
+    def _clear_indexes(self):
+        """Drop all nodes, edges and derived indexes (used before a full rebuild)"""
+        self._generation += 1
+        self._dirty_shards.update(f"{i:02x}" for i in range(256))
+        self.nodes_by_id.clear()
+        self.edges_by_id.clear()
+        self.title_to_id.clear()
+        self.path_to_id.clear()
+        self.category_index.clear()
+        self.tag_index.clear()
+        self.hierarchy_index.clear()
+        self._hierarchy_depth = None
+        self._title_lower.clear()
+        self._tag_lower.clear()
+        self._title_trigrams.clear()
+        self._node_slot.clear()
+        self._slot_node_ids.clear()
+        self._slot_updated_at = np.full(64, -np.inf)
+        self._free_slots.clear()
+        self._slot_vectors = None
+        self._slot_vector_scales = np.zeros(64, dtype=np.float32)
+        self._slot_sq_norms = np.zeros(64, dtype=np.float32)
+        self._slot_has_vector = np.zeros(64, dtype=bool)
+        self._vector_count = 0
+        self._degree.clear()
+        self._rel_type_counts.clear()
+        self.edges_by_node.clear()
+        self._in_edges.clear()
+        self._orphans.clear()
+        self._broken_edges.clear()
+        self.unresolved_by_title.clear()
+        self._unresolved_by_node.clear()
+        self.graph.clear()
     
     async def _resolve_wiki_links(self):
         """Resolve wiki-links to actual node IDs and create edges"""
         print(f"🔗 Starting wiki-link resolution for {len(self.nodes_by_id)} nodes")
-        print(f"   Available titles: {list(self.title_to_id.keys())}")
+        print(f"   Available titles: {len(self.title_to_id)}")
         
         resolved_count = 0
         broken_count = 0
@@ -389,37 +1050,120 @@ class EnhancedKnowledgeGraph:
             if file_path.exists():
                 try:
                     parsed_note = self.markdown_parser.parse_file(file_path)
-                    
-                    for wiki_link in parsed_note.wiki_links:
-                        # Try multiple resolution strategies
-                        target_id = self._resolve_wiki_link_target(wiki_link.target)
-                        
-                        if target_id:
-                            # Create edge for wiki-link
-                            edge_id = f"{node.id}-{target_id}-wiki_link"
-                            edge = GraphEdge(
-                                source_id=node.id,
-                                target_id=target_id,
-                                relation_type="wiki_link",
-                                metadata={
-                                    'type': 'wiki_link',
-                                    'display': wiki_link.display,
-                                    'line_number': wiki_link.line_number,
-                                    'context': wiki_link.context
-                                }
-                            )
-                            self.edges_by_id[edge_id] = edge
-                            resolved_count += 1
-                            print(f"   ✅ Resolved: {wiki_link.target} -> {target_id}")
-                        else:
-                            broken_count += 1
-                            print(f"   ⚠️  Broken wiki-link: '{wiki_link.target}' in {node.title}")
+                    resolved, broken = self._resolve_node_wiki_links(node, parsed_note.wiki_links)
+                    resolved_count += resolved
+                    broken_count += broken
                             
                 except Exception as e:
                     print(f"Error resolving wiki-links for {node.title}: {e}")
         
         print(f"🔗 Wiki-link resolution complete: {resolved_count} resolved, {broken_count} broken")
     
+    def _resolve_wiki_links_for(self, node_id: str, wiki_links: Optional[List[WikiLink]] = None) -> Tuple[int, int]:
+        """
+        Resolve wiki-links around a single added or edited node.
+        
+        Resolves the node's own links (parsing its file if wiki_links is not
+        given), then re-resolves the notes whose previously unresolved links
+        now match this node. Returns (resolved, broken) counts for the node's
+        own links.
+        """
+        node = self.nodes_by_id.get(node_id)
+        if node is None:
+            return 0, 0
+        
+        if wiki_links is None:
+            try:
+                wiki_links = self.markdown_parser.parse_file(Path(node.file_path)).wiki_links
+            except Exception as e:
+                print(f"Error resolving wiki-links for {node.title}: {e}")
+                return 0, 0
+        counts = self._resolve_node_wiki_links(node, wiki_links)
+        
+        # Notes whose dangling links may now point at this node
+        waiting = set()
+        for target, source_ids in self.unresolved_by_title.items():
+            if self._wiki_link_matches(target, node):
+                waiting.update(source_ids)
+        waiting.discard(node_id)
+        
+        for source_id in waiting:
+            source = self.nodes_by_id.get(source_id)
+            if source is None:
+                self._clear_unresolved(source_id)
+                continue
+            try:
+                parsed_note = self.markdown_parser.parse_file(Path(source.file_path))
+                self._resolve_node_wiki_links(source, parsed_note.wiki_links)
+            except Exception as e:
+                print(f"Error resolving wiki-links for {source.title}: {e}")
+        
+        return counts
+    
+    def _register_unresolved(self, node_id: str, target: str):
+        """Remember that node_id links to target without it resolving"""
+        self.unresolved_by_title.setdefault(target, set()).add(node_id)
+        self._unresolved_by_node.setdefault(node_id, set()).add(target)
+    
+    def _unregister_unresolved(self, node_id: str, target: str):
+        """Forget a single unresolved link"""
+        source_ids = self.unresolved_by_title.get(target)
+        if source_ids is not None:
+            source_ids.discard(node_id)
+            if not source_ids:
+                del self.unresolved_by_title[target]
+        targets = self._unresolved_by_node.get(node_id)
+        if targets is not None:
+            targets.discard(target)
+            if not targets:
+                del self._unresolved_by_node[node_id]
+    
+    def _clear_unresolved(self, node_id: str):
+        """Forget every unresolved link from node_id"""
+        for target in self._unresolved_by_node.pop(node_id, ()):
+            source_ids = self.unresolved_by_title.get(target)
+            if source_ids is not None:
+                source_ids.discard(node_id)
+                if not source_ids:
+                    del self.unresolved_by_title[target]
+    
+    def _resolve_node_wiki_links(self, node: GraphNode, wiki_links: List[WikiLink]) -> Tuple[int, int]:
+        """Create edges for one node's wiki-links; returns (resolved, broken) counts"""
+        resolved_count = 0
+        broken_count = 0
+        self._clear_unresolved(node.id)
+        created_at = datetime.now().isoformat()
+        
+        for wiki_link in wiki_links:
+            # Try multiple resolution strategies
+            target_id = self._resolve_wiki_link_target(wiki_link.target)
+            
+            if target_id:
+                # Create edge for wiki-link
+                edge_id = f"{node.id}-{target_id}-wiki_link"
+                edge = GraphEdge(
+                    source_id=node.id,
+                    target_id=target_id,
+                    relation_type="wiki_link",
+                    metadata={
+                        'type': 'wiki_link',
+                        'target': wiki_link.target,
+                        'display': wiki_link.display,
+                        'line_number': wiki_link.line_number,
+                        'context': wiki_link.context
+                    },
+                    created_at=created_at
+                )
+                self._add_edge(edge_id, edge)
+                resolved_count += 1
+                print(f"   ✅ Resolved: {wiki_link.target} -> {target_id}")
+            else:
+                broken_count += 1
+                self._register_unresolved(node.id, wiki_link.target)
+                print(f"   ⚠️  Broken wiki-link: '{wiki_link.target}' in {node.title}")
+        
+        return resolved_count, broken_count
+    
     def _resolve_wiki_link_target(self, target: str) -> Optional[str]:
         """Resolve a wiki-link target to a node ID using multiple strategies including path-based resolution"""
         # Strategy 1: Exact match
@@ -469,6 +1213,35 @@ class EnhancedKnowledgeGraph:
         
         return None
     
+    def _wiki_link_matches(self, target: str, node: GraphNode) -> bool:
+        """Whether _resolve_wiki_link_target's strategies would accept node for target"""
+        if target == node.title:
+            return True
+        
+        if '/' in target and node.file_path:
+            try:
+                notes_path = Path(os.getenv("NOTES_DIRECTORY", "./notes"))
+                wiki_path = str(Path(node.file_path).relative_to(notes_path)).replace('.md', '')
+                if wiki_path == target or wiki_path.lower() == target.lower():
+                    return True
+            except ValueError:
+                pass
+        
+        target_lower = target.lower()
+        title_lower = node.title.lower()
+        if target_lower in title_lower or title_lower in target_lower:
+            return True
+        
+        cleaned_target = target.replace('-', ' ').replace('_', ' ').strip()
+        cleaned_title = node.title.replace('-', ' ').replace('_', ' ').strip()
+        if cleaned_target.lower() == cleaned_title.lower():
+            return True
+        
+        if '/' in target:
+            return self._wiki_link_matches(target.split('/')[-1], node)
+        
+        return False
+    
     def generate_obsidian_wiki_link(self, node_id: str) -> str:
         """
         Generate a proper Obsidian wiki-link for a node that will resolve correctly.
@@ -500,12 +1273,13 @@ class EnhancedKnowledgeGraph:
             tags = []
         
         # Create a temporary parsed note
+        now = datetime.now().isoformat()
         metadata = {
             'title': title,
             'category': category,
             'tags': tags,
-            'created': datetime.now().isoformat(),
-            'updated': datetime.now().isoformat()
+            'created': now,
+            'updated': now
         }
         
         parsed_note = ParsedNote(
@@ -519,63 +1293,104 @@ class EnhancedKnowledgeGraph:
         # Add to graph
         await self._add_parsed_note(Path(file_path) if file_path else Path(f"{title}.md"), parsed_note)
         
-        # Save graph
-        await self._save_graph()
+        # Leave the save to the periodic flush
+        self.dirty = True
         
         return parsed_note.id
     
     async def search_semantic(self, query: str, limit: int = 10) -> List[SearchResult]:
-        """Semantic search using ChromaDB"""
-        if not self.collection:
-            return []
-            
+        """Semantic search over node embeddings"""
+        key = (query, limit)
+        cached = self._search_cache.get(key)
+        if cached is not None and cached[0] == self._generation:
+            self._search_cache.move_to_end(key)
+            return list(cached[1])
+        
         try:
-            provider_info = self.embedding_service.get_provider_info()
-            
-            if provider_info['type'] == 'openai':
-                query_embedding = await self.embedding_service.embed_text(query)
-                results = self.collection.query(
-                    query_embeddings=[query_embedding],
-                    n_results=limit
-                )
-            else:
-                results = self.collection.query(
-                    query_texts=[query],
-                    n_results=limit
-                )
-            
-            search_results = []
-            
-            if results['documents'] and results['documents'][0]:
-                for i, doc in enumerate(results['documents'][0]):
-                    metadata = results['metadatas'][0][i]
-                    distance = results['distances'][0][i] if results['distances'] else 0
-                    similarity = 1 - distance
-                    
-                    search_results.append(SearchResult(
-                        content=doc,
-                        category=metadata.get('category', 'Unknown'),
-                        similarity=similarity,
-                        node_id=results['ids'][0][i],
-                        metadata=metadata
-                    ))
-            
-            return search_results
-            
-        except Exception as e:
-            print(f"Error in semantic search: {e}")
+            generation = self._generation
+            results = self._to_search_results(await self._query_nodes(query, limit))
+        except Exception:
+            logger.exception("Semantic search failed")
+            return []
+        
+        self._search_cache[key] = (generation, results)
+        self._search_cache.move_to_end(key)
+        if len(self._search_cache) > self.QUERY_CACHE_SIZE:
+            self._search_cache.popitem(last=False)
+        return list(results)
+    
+    async def _embed_query(self, query: str) -> List[float]:
+        """Embed a search query, reusing the embedding of a recently seen identical query"""
+        embedding = self._query_embeddings.get(query)
+        if embedding is not None:
+            self._query_embeddings.move_to_end(query)
+            return embedding
+        
+        async with self._embed_sem:
+            embedding = await self.embedding_service.embed_text(query)
+        self._query_embeddings[query] = embedding
+        if len(self._query_embeddings) > self.QUERY_CACHE_SIZE:
+            self._query_embeddings.popitem(last=False)
+        return embedding
+    
+    async def _query_nodes(self, query: str, n_results: int) -> Dict[str, Any]:
+        """
+        Nearest nodes to query, in ChromaDB's query response shape.
+        
+        Served from the in-memory vectors; ChromaDB is only queried while
+        none are loaded.
+        """
+        if self._vector_count:
+            return self._nearest_vectors(await self._embed_query(query), n_results)
+        return await self._query_chroma(query, n_results)
+    
+    async def _query_chroma(self, query: str, n_results: int) -> Dict[str, Any]:
+        """Query ChromaDB (rebound per provider in initialize)"""
+        return {'ids': [[]], 'documents': [[]], 'metadatas': [[]], 'distances': [[]]}
+    
+    async def _query_chroma_openai(self, query: str, n_results: int) -> Dict[str, Any]:
+        """Query ChromaDB with a manually generated OpenAI query embedding"""
+        return await asyncio.to_thread(
+            self.collection.query,
+            query_embeddings=[await self._embed_query(query)],
+            n_results=n_results
+        )
+    
+    async def _query_chroma_st(self, query: str, n_results: int) -> Dict[str, Any]:
+        """Query ChromaDB using the collection's sentence-transformer embedding function"""
+        return await asyncio.to_thread(
+            self.collection.query,
+            query_texts=[query],
+            n_results=n_results
+        )
+    
+    def _to_search_results(self, results: Dict[str, Any]) -> List[SearchResult]:
+        """Convert a ChromaDB query response into SearchResult objects"""
+        if not results['documents'] or not results['documents'][0]:
             return []
+        
+        docs = results['documents'][0]
+        distances = results['distances'][0] if results['distances'] else [0] * len(docs)
+        return [
+            SearchResult(
+                content=doc,
+                category=metadata.get('category', 'Unknown'),
+                similarity=1 - distance,
+                node_id=node_id,
+                metadata=metadata
+            )
+            for doc, metadata, distance, node_id in zip(docs, results['metadatas'][0], distances, results['ids'][0])
+        ]
     
     async def search_content_in_files(self, query: str, case_sensitive: bool = False, limit: int = 10) -> List[Dict[str, Any]]:
         """Search for content in actual files using grep-like functionality"""
         import re
         import asyncio
         
-        search_results = []
         notes_path = Path(self.notes_directory)
         
         if not notes_path.exists():
-            return search_results
+            return []
         
         # Prepare regex pattern
         pattern_flags = 0 if case_sensitive else re.IGNORECASE
@@ -585,15 +1400,18 @@ class EnhancedKnowledgeGraph:
             # If regex fails, escape the query and search as literal text
             pattern = re.compile(re.escape(query), pattern_flags)
         
+        # Walk and read the vault in a thread so the event loop (and the other search phases) keep running
+        return await asyncio.to_thread(self._search_files, notes_path, pattern, limit)
+    
+    def _search_files(self, notes_path: Path, pattern: re.Pattern, limit: int) -> List[Dict[str, Any]]:
+        """Blocking part of search_content_in_files: scan the note files for pattern"""
+        search_results = []
+        
         try:
             for md_file in notes_path.rglob("*.md"):
                 try:
                     # Get corresponding node for metadata
-                    node = None
-                    for n in self.nodes_by_id.values():
-                        if n.file_path == str(md_file):
-                            node = n
-                            break
+                    node = self.nodes_by_id.get(self.path_to_id.get(str(md_file)))
                     
                     if not node:
                         continue
@@ -631,12 +1449,12 @@ class EnhancedKnowledgeGraph:
                     if len(search_results) >= limit:
                         break
                         
-                except Exception as e:
-                    print(f"Error searching in file {md_file}: {e}")
+                except Exception:
+                    logger.exception("Content search failed for %s", md_file)
                     continue
         
-        except Exception as e:
-            print(f"Error in content search: {e}")
+        except Exception:
+            logger.exception("Content search failed")
         
         # Sort by number of matches (descending)
         search_results.sort(key=lambda x: x['total_matches'], reverse=True)
@@ -659,16 +1477,16 @@ class EnhancedKnowledgeGraph:
         """Get all nodes that link to this node"""
         backlinks = []
         
-        for edge in self.edges_by_id.values():
-            if edge.target_id == node_id:
-                source_node = self.nodes_by_id.get(edge.source_id)
-                if source_node:
-                    backlinks.append({
-                        'node_id': edge.source_id,
-                        'title': source_node.title,
-                        'relation_type': edge.relation_type,
-                        'metadata': edge.metadata
-                    })
+        for edge_id in self._in_edges.get(node_id, ()):
+            edge = self.edges_by_id[edge_id]
+            source_node = self.nodes_by_id.get(edge.source_id)
+            if source_node:
+                backlinks.append({
+                    'node_id': edge.source_id,
+                    'title': source_node.title,
+                    'relation_type': edge.relation_type,
+                    'metadata': edge.metadata
+                })
         
         return backlinks
     
@@ -676,7 +1494,8 @@ class EnhancedKnowledgeGraph:
         """Get all nodes that this node links to"""
         outgoing_links = []
         
-        for edge in self.edges_by_id.values():
+        for edge_id in self.edges_by_node.get(node_id, ()):
+            edge = self.edges_by_id[edge_id]
             if edge.source_id == node_id:
                 target_node = self.nodes_by_id.get(edge.target_id)
                 if target_node:
@@ -704,61 +1523,76 @@ class EnhancedKnowledgeGraph:
         if parent_id not in self.nodes_by_id:
             return {}
         
-        parent_node = self.nodes_by_id[parent_id]
-        children_ids = self.hierarchy_index.get(parent_id, set())
-        
-        children = []
-        for child_id in children_ids:
-            if child_id in self.nodes_by_id:
-                child_hierarchy = await self.get_hierarchy(child_id)
-                children.append(child_hierarchy)
+        def entry(node_id: str) -> Dict[str, Any]:
+            node = self.nodes_by_id[node_id]
+            return {
+                'id': node_id,
+                'title': node.title,
+                'category': node.category,
+                'children': []
+            }
         
-        return {
-            'id': parent_id,
-            'title': parent_node.title,
-            'category': parent_node.category,
-            'children': children
-        }
+        # Breadth-first; visited guards against cycles in parent links
+        root = entry(parent_id)
+        visited = {parent_id}
+        queue = deque([root])
+        while queue:
+            current = queue.popleft()
+            for child_id in self.hierarchy_index.get(current['id'], ()):
+                if child_id in self.nodes_by_id and child_id not in visited:
+                    visited.add(child_id)
+                    child = entry(child_id)
+                    current['children'].append(child)
+                    queue.append(child)
+        
+        return root
     
     async def find_orphans(self) -> List[Dict[str, Any]]:
         """Find notes with no incoming links"""
-        orphans = []
-        
-        nodes_with_incoming = set()
-        for edge in self.edges_by_id.values():
-            nodes_with_incoming.add(edge.target_id)
-        
-        for node_id, node in self.nodes_by_id.items():
-            if node_id not in nodes_with_incoming:
-                orphans.append(asdict(node))
-        
-        return orphans
+        return [asdict(node) for node_id, node in self.nodes_by_id.items() if node_id in self._orphans]
     
     async def find_broken_links(self) -> List[Dict[str, Any]]:
         """Find links to non-existent nodes"""
         broken_links = []
         
-        for edge in self.edges_by_id.values():
-            if edge.target_id not in self.nodes_by_id:
-                source_node = self.nodes_by_id.get(edge.source_id)
-                broken_links.append({
-                    'source_id': edge.source_id,
-                    'source_title': source_node.title if source_node else "Unknown",
-                    'target_id': edge.target_id,
-                    'relation_type': edge.relation_type,
-                    'metadata': edge.metadata
-                })
+        for edge_id in self._broken_edges:
+            edge = self.edges_by_id[edge_id]
+            source_node = self.nodes_by_id.get(edge.source_id)
+            broken_links.append({
+                'source_id': edge.source_id,
+                'source_title': source_node.title if source_node else "Unknown",
+                'target_id': edge.target_id,
+                'relation_type': edge.relation_type,
+                'metadata': edge.metadata
+            })
         
         return broken_links
     
     async def get_graph_data(self) -> Dict[str, Any]:
         """Get complete graph data for visualization"""
-        nodes = []
-        edges = []
-        
-        # Convert nodes for visualization (excluding content for efficiency)
-        for node in self.nodes_by_id.values():
-            nodes.append({
+        # Polling clients get the previous payload until a node or edge changes
+        generation = self._generation
+        if self._graph_data_cache is not None and self._graph_data_cache[0] == generation:
+            return self._graph_data_cache[1]
+        
+        # Snapshot on the loop so mutations can't race the worker thread's iteration
+        graph_data = await asyncio.to_thread(
+            self._build_graph_data,
+            list(self.nodes_by_id.values()),
+            list(self.edges_by_id.values()),
+            list(self.category_index),
+            list(self.tag_index)
+        )
+        self._graph_data_cache = (generation, graph_data)
+        return graph_data
+    
+    @staticmethod
+    def _build_graph_data(nodes: List[GraphNode], edges: List[GraphEdge], categories: List[str], tags: List[str]) -> Dict[str, Any]:
+        """Build the get_graph_data payload from snapshots (run in a worker thread)"""
+        # Convert nodes for visualization (excluding content for efficiency).
+        # Metadata dicts are shared rather than copied; callers only serialize them.
+        node_data = [
+            {
                 'id': node.id,
                 'title': node.title,
                 'category': node.category,
@@ -767,29 +1601,31 @@ class EnhancedKnowledgeGraph:
                 'content_hash': node.content_hash,
                 'created_at': node.created_at,
                 'updated_at': node.updated_at,
-                'metadata': {
-                    **node.metadata
-                }
-            })
+                'metadata': node.metadata
+            }
+            for node in nodes
+        ]
         
         # Convert edges for visualization
-        for edge in self.edges_by_id.values():
-            edges.append({
+        edge_data = [
+            {
                 'source': edge.source_id,
                 'target': edge.target_id,
                 'weight': edge.weight,
                 'relation_type': edge.relation_type,
                 'metadata': edge.metadata
-            })
+            }
+            for edge in edges
+        ]
         
         return {
-            'nodes': nodes,
-            'edges': edges,
+            'nodes': node_data,
+            'edges': edge_data,
             'stats': {
-                'total_nodes': len(nodes),
-                'total_edges': len(edges),
-                'categories': list(self.category_index.keys()),
-                'tags': list(self.tag_index.keys())
+                'total_nodes': len(node_data),
+                'total_edges': len(edge_data),
+                'categories': categories,
+                'tags': tags
             }
         }
     
@@ -801,93 +1637,104 @@ class EnhancedKnowledgeGraph:
             'categories': {cat: len(nodes) for cat, nodes in self.category_index.items()},
             'tags': {tag: len(nodes) for tag, nodes in self.tag_index.items()},
             'relationship_types': self._get_relationship_type_stats(),
-            'orphans': len(await self.find_orphans()),
-            'broken_links': len(await self.find_broken_links()),
+            'orphans': len(self._orphans),
+            'broken_links': len(self._broken_edges),
             'hierarchy_depth': self._calculate_hierarchy_depth()
         }
     
     def _get_relationship_type_stats(self) -> Dict[str, int]:
         """Get statistics on relationship types"""
-        stats = {}
-        for edge in self.edges_by_id.values():
-            stats[edge.relation_type] = stats.get(edge.relation_type, 0) + 1
-        return stats
+        return dict(self._rel_type_counts)
     
     def _calculate_hierarchy_depth(self) -> int:
         """Calculate the maximum depth of the hierarchy"""
-        def depth(node_id: str, visited: Set[str] = None) -> int:
-            if visited is None:
-                visited = set()
-            
-            if node_id in visited:
-                return 0
-            
-            visited.add(node_id)
-            children_ids = self.hierarchy_index.get(node_id, set())
-            
-            if not children_ids:
-                return 1
-            
-            return 1 + max(depth(child_id, visited.copy()) for child_id in children_ids)
-        
+        # The walk covers the whole hierarchy; reuse it until a node is added or removed
+        if self._hierarchy_depth is None:
+            self._hierarchy_depth = self._walk_hierarchy_depth()
+        return self._hierarchy_depth
+    
+    def _walk_hierarchy_depth(self) -> int:
+        """Walk the hierarchy from every root and return the tallest subtree's height"""
         # Find root nodes (nodes with no parents)
-        root_nodes = []
-        for node_id, node in self.nodes_by_id.items():
-            if not node.parent_id:
-                root_nodes.append(node_id)
+        root_nodes = [node_id for node_id, node in self.nodes_by_id.items() if not node.parent_id]
         
         if not root_nodes:
             return 0
         
-        return max(depth(root_id) for root_id in root_nodes)
+        # height doubles as the visited set shared across roots, so overlapping
+        # subtrees are walked once
+        height: Dict[str, int] = {}
+        for root_id in root_nodes:
+            self._subtree_height(root_id, height)
+            if len(height) >= len(self.nodes_by_id):
+                # Every node has a height, so the remaining roots are already covered
+                break
+        
+        return max(height[root_id] for root_id in root_nodes)
+    
+    def _subtree_height(self, node_id: str, memo: Dict[str, int]) -> int:
+        """
+        Height of the hierarchy subtree rooted at node_id, memoized in memo.
+        
+        Uses an iterative post-order walk so deep hierarchies don't hit the
+        recursion limit. Back-edges in a cyclic hierarchy count as height 0.
+        """
+        if node_id in memo:
+            return memo[node_id]
+        
+        in_progress = {node_id}
+        stack = [(node_id, iter(self.hierarchy_index.get(node_id, ())))]
+        
+        while stack:
+            current_id, children = stack[-1]
+            for child_id in children:
+                if child_id in memo or child_id in in_progress:
+                    continue
+                in_progress.add(child_id)
+                stack.append((child_id, iter(self.hierarchy_index.get(child_id, ()))))
+                break
+            else:
+                stack.pop()
+                in_progress.discard(current_id)
+                memo[current_id] = 1 + max(
+                    (memo.get(child_id, 0) for child_id in self.hierarchy_index.get(current_id, ())),
+                    default=0
+                )
+        
+        return memo[node_id]
 
     async def get_pkm_insights(self) -> Dict[str, Any]:
         """Get PKM insights and analytics"""
         insights = {}
         
         # Top connected nodes
-        if self.nodes_by_id:
-            node_connections = {}
-            for edge in self.edges_by_id.values():
-                node_connections[edge.source_id] = node_connections.get(edge.source_id, 0) + 1
-                node_connections[edge.target_id] = node_connections.get(edge.target_id, 0) + 1
-            
-            if node_connections:
-                top_connected = sorted(node_connections.items(), key=lambda x: x[1], reverse=True)[:5]
-                insights["top_connected_nodes"] = [
-                    {
-                        "title": self.nodes_by_id[node_id].title,
-                        "connections": count
-                    } for node_id, count in top_connected if node_id in self.nodes_by_id
-                ]
-        
-        # Orphan nodes (no connections)
-        connected_nodes = set()
-        for edge in self.edges_by_id.values():
-            connected_nodes.add(edge.source_id)
-            connected_nodes.add(edge.target_id)
-        
-        orphan_nodes = []
-        for node_id, node in self.nodes_by_id.items():
-            if node_id not in connected_nodes:
-                orphan_nodes.append({
-                    "title": node.title,
-                    "category": node.category
-                })
+        if self.nodes_by_id and self._degree:
+            top_connected = self._degree.most_common(5)
+            insights["top_connected_nodes"] = [
+                {
+                    "title": self.nodes_by_id[node_id].title,
+                    "connections": count
+                } for node_id, count in top_connected if node_id in self.nodes_by_id
+            ]
+        
+        # Orphan nodes (no connections), limited to 10
+        orphan_nodes = islice(
+            (node for node_id, node in self.nodes_by_id.items() if node_id not in self._degree),
+            10
+        )
         
-        insights["orphan_nodes"] = orphan_nodes[:10]  # Limit to 10
+        insights["orphan_nodes"] = [
+            {
+                "title": node.title,
+                "category": node.category
+            } for node in orphan_nodes
+        ]
         
         # Category distribution
-        insights["category_distribution"] = {}
-        for category, node_ids in self.category_index.items():
-            insights["category_distribution"][category] = len(node_ids)
+        insights["category_distribution"] = {category: len(node_ids) for category, node_ids in self.category_index.items()}
         
         # Recent activity
-        recent_nodes = sorted(
-            self.nodes_by_id.values(),
-            key=lambda x: x.updated_at,
-            reverse=True
-        )[:5]
+        recent_nodes = [self.nodes_by_id[node_id] for node_id in self._most_recent_node_ids(5)]
         
         insights["recent_activity"] = [
             {
@@ -899,6 +1746,18 @@ class EnhancedKnowledgeGraph:
         
         return insights
     
+    def _most_recent_node_ids(self, k: int) -> List[str]:
+        """IDs of the k most recently updated nodes, newest first"""
+        updated_at = self._slot_updated_at[:len(self._slot_node_ids)]
+        k = min(k, len(self._node_slot))
+        if k == 0:
+            return []
+        
+        # Partition out the top k slots, then order just those
+        top = np.argpartition(-updated_at, k - 1)[:k]
+        top = top[np.argsort(-updated_at[top], kind='stable')]
+        return [self._slot_node_ids[slot] for slot in top]
+    
     def _chunk_text(self, text: str, node_id: str, chunk_size: int = 500, overlap: int = 50) -> List[TextChunk]:
         """
         Split text into overlapping chunks for better semantic search
@@ -926,45 +1785,50 @@ class EnhancedKnowledgeGraph:
         start = 0
         chunk_index = 0
         
-        # Try to split on sentence boundaries first
-        sentences = re.split(r'[.!?]+\s+', text)
-        current_chunk = ""
+        # Try to split on sentence boundaries first; the current chunk is kept as a
+        # list of parts (joined with spaces) so appending a sentence doesn't copy it
+        parts: List[str] = []
+        current_len = 0
         current_start = 0
         
-        for sentence in sentences:
+        for sentence in _iter_sentences(text):
             sentence = sentence.strip()
             if not sentence:
                 continue
             
             # If adding this sentence would exceed chunk_size, save current chunk
-            if len(current_chunk) + len(sentence) > chunk_size and current_chunk:
+            if current_len + len(sentence) > chunk_size and parts:
+                current_chunk = " ".join(parts)
                 chunks.append(TextChunk(
                     content=current_chunk.strip(),
                     start_index=current_start,
-                    end_index=current_start + len(current_chunk),
+                    end_index=current_start + current_len,
                     chunk_index=chunk_index,
                     total_chunks=0,  # Will be updated later
                     node_id=node_id
                 ))
                 
                 # Start new chunk with overlap
-                overlap_text = current_chunk[-overlap:] if len(current_chunk) > overlap else current_chunk
-                current_chunk = overlap_text + " " + sentence
-                current_start = current_start + len(current_chunk) - len(overlap_text) - len(sentence) - 1
+                overlap_text = current_chunk[-overlap:] if current_len > overlap else current_chunk
+                parts = [overlap_text, sentence]
+                current_len = len(overlap_text) + 1 + len(sentence)
                 chunk_index += 1
             else:
-                if current_chunk:
-                    current_chunk += " " + sentence
+                if parts:
+                    parts.append(sentence)
+                    current_len += 1 + len(sentence)
                 else:
-                    current_chunk = sentence
+                    parts = [sentence]
+                    current_len = len(sentence)
                     current_start = start
         
         # Add the last chunk if it has content
+        current_chunk = " ".join(parts)
         if current_chunk.strip():
             chunks.append(TextChunk(
                 content=current_chunk.strip(),
                 start_index=current_start,
-                end_index=current_start + len(current_chunk),
+                end_index=current_start + current_len,
                 chunk_index=chunk_index,
                 total_chunks=0,  # Will be updated later
                 node_id=node_id
@@ -1004,197 +1868,212 @@ class EnhancedKnowledgeGraph:
         Returns:
             List of UnifiedSearchResult objects sorted by relevance
         """
-        all_results = []
+        # Every phase resolves its hits to nodes, so an empty graph can't match anything
+        if not self.nodes_by_id:
+            return []
         
-        # 1. Semantic Search with Chunking
+        # Only schedule phases whose backing index can produce results
+        phases = []
         if include_semantic and self.collection:
-            try:
-                # Create chunks for all nodes if not already done
-                chunked_content = []
-                chunk_to_node = {}
-                
-                for node in self.nodes_by_id.values():
-                    chunks = self._chunk_text(node.content, node.id, chunk_size)
-                    for chunk in chunks:
-                        chunk_id = f"{node.id}_chunk_{chunk.chunk_index}"
-                        chunked_content.append(chunk.content)
-                        chunk_to_node[len(chunked_content) - 1] = {
-                            'node': node,
-                            'chunk': chunk
-                        }
-                
-                # Perform semantic search on chunks
-                provider_info = self.embedding_service.get_provider_info()
+            phases.append(self._semantic_phase(query, limit, semantic_threshold))
+        if include_grep:
+            phases.append(self._grep_phase(query, limit))
+        if include_title:
+            phases.append(self._title_phase(query))
+        if include_tag and self.tag_index:
+            phases.append(self._tag_phase(query))
+        
+        if not phases:
+            return []
+        
+        # Run the search phases concurrently; results keep the phase order
+        parts = await asyncio.gather(*phases)
+        all_results = list(chain.from_iterable(parts))
+        
+        # 5. Remove duplicates and keep the most relevant results
+        best: Dict[Tuple[str, str], UnifiedSearchResult] = {}
+        for result in all_results:
+            # Use node_id + source_type as key to allow same node from different search types
+            key = (result.node_id, result.source_type)
+            previous = best.get(key)
+            if previous is None or result.relevance_score > previous.relevance_score:
+                best[key] = result
+        
+        # Top results by relevance score (descending), without sorting everything
+        return heapq.nlargest(limit, best.values(), key=attrgetter('relevance_score'))
+    
+    async def _semantic_phase(self, query: str, limit: int, semantic_threshold: float) -> List[UnifiedSearchResult]:
+        """Semantic search for unified_search"""
+        results_out = []
+        
+        try:
+            # Chunks have no embeddings of their own, so search at node level
+            results = await self._query_nodes(query, min(limit, len(self.nodes_by_id)))
+            
+            if results['documents'] and results['documents'][0]:
+                docs = results['documents'][0]
+                ids = results['ids'][0]
+                distances = results['distances'][0] if results['distances'] else [0.0] * len(docs)
                 
-                if provider_info['type'] == 'openai':
-                    query_embedding = await self.embedding_service.embed_text(query)
-                    # For chunked search, we need to search against our chunk embeddings
-                    # For now, fall back to node-level search
-                    results = self.collection.query(
-                        query_embeddings=[query_embedding],
-                        n_results=min(limit, len(self.nodes_by_id))
-                    )
+                # Score and threshold all hits at once, then only visit the survivors
+                similarities = 1.0 - np.asarray(distances, dtype=np.float64)
+                for i in np.flatnonzero(similarities >= semantic_threshold):
+                    similarity = float(similarities[i])
+                    node_id = ids[i]
+                    node = self.nodes_by_id.get(node_id)
+                    
+                    if node:
+                        doc = docs[i]
+                        # Create snippet from the most relevant part
+                        snippet = self._create_semantic_snippet(doc, query, max_length=200)
+                        
+                        results_out.append(UnifiedSearchResult(
+                            content=doc,
+                            title=node.title,
+                            category=node.category,
+                            source_type="semantic",
+                            relevance_score=similarity,
+                            node_id=node_id,
+                            file_path=node.file_path,
+                            snippet=snippet,
+                            metadata={"similarity": similarity, "search_type": "semantic"}
+                        ))
+            
+        except Exception:
+            logger.exception("Semantic search failed")
+        
+        return results_out
+    
+    async def _grep_phase(self, query: str, limit: int) -> List[UnifiedSearchResult]:
+        """Grep/content search for unified_search"""
+        results_out = []
+        
+        try:
+            grep_results = await self.search_content_in_files(query, limit=limit//2)
+            
+            for result in grep_results:
+                node = self.nodes_by_id.get(result['node_id'])
+                if node:
+                    for match in result['matches']:
+                        snippet = self._create_grep_snippet(
+                            match['line_content'], 
+                            query, 
+                            max_length=200
+                        )
+                        
+                        # Calculate relevance based on number of matches and position
+                        relevance = min(1.0, result['total_matches'] * 0.1 + 0.5)
+                        
+                        results_out.append(UnifiedSearchResult(
+                            content=match['context'],
+                            title=node.title,
+                            category=node.category,
+                            source_type="grep",
+                            relevance_score=relevance,
+                            node_id=result['node_id'],
+                            file_path=result['file_path'],
+                            line_number=match['line_number'],
+                            context=match['context'],
+                            snippet=snippet,
+                            metadata={
+                                "total_matches": result['total_matches'],
+                                "line_number": match['line_number'],
+                                "search_type": "grep"
+                            }
+                        ))
+            
+        except Exception:
+            logger.exception("Grep search failed")
+        
+        return results_out
+    
+    async def _title_phase(self, query: str) -> List[UnifiedSearchResult]:
+        """Title search for unified_search"""
+        results_out = []
+        query_lower = query.lower()
+        
+        for node_id in self._title_candidates(query_lower):
+            title_lower = self._title_lower[node_id]
+            if query_lower in title_lower:
+                node = self.nodes_by_id[node_id]
+                # Calculate relevance based on how much of title matches
+                if title_lower == query_lower:
+                    relevance = 1.0
+                elif title_lower.startswith(query_lower):
+                    relevance = 0.9
                 else:
-                    results = self.collection.query(
-                        query_texts=[query],
-                        n_results=min(limit, len(self.nodes_by_id))
-                    )
+                    relevance = 0.7
                 
-                if results['documents'] and results['documents'][0]:
-                    for i, doc in enumerate(results['documents'][0]):
-                        metadata = results['metadatas'][0][i]
-                        distance = results['distances'][0][i] if results['distances'] else 0
-                        similarity = 1 - distance
-                        
-                        if similarity >= semantic_threshold:
-                            node_id = results['ids'][0][i]
-                            node = self.nodes_by_id.get(node_id)
-                            
-                            if node:
-                                # Create snippet from the most relevant part
-                                snippet = self._create_semantic_snippet(doc, query, max_length=200)
-                                
-                                all_results.append(UnifiedSearchResult(
-                                    content=doc,
-                                    title=node.title,
-                                    category=node.category,
-                                    source_type="semantic",
-                                    relevance_score=similarity,
-                                    node_id=node_id,
-                                    file_path=node.file_path,
-                                    snippet=snippet,
-                                    metadata={"similarity": similarity, "search_type": "semantic"}
-                                ))
+                snippet = self._create_title_snippet(node.title, query, max_length=200)
                 
-            except Exception as e:
-                print(f"Error in semantic search: {e}")
+                results_out.append(UnifiedSearchResult(
+                    content=node.content[:300] + "..." if len(node.content) > 300 else node.content,
+                    title=node.title,
+                    category=node.category,
+                    source_type="title",
+                    relevance_score=relevance,
+                    node_id=node.id,
+                    file_path=node.file_path,
+                    snippet=snippet,
+                    metadata={"search_type": "title"}
+                ))
         
-        # 2. Grep/Content Search
-        if include_grep:
-            try:
-                grep_results = await self.search_content_in_files(query, limit=limit//2)
+        return results_out
+    
+    async def _tag_phase(self, query: str) -> List[UnifiedSearchResult]:
+        """Tag search for unified_search"""
+        results_out = []
+        # Remove # if present in query
+        clean_query = query.lower().replace('#', '')
+        
+        for tag, tag_lower in self._tag_lower.items():
+            if clean_query in tag_lower:
+                relevance = 1.0 if tag_lower == clean_query else 0.8
                 
-                for result in grep_results:
-                    node = self.nodes_by_id.get(result['node_id'])
+                for node_id in self.tag_index[tag]:
+                    node = self.nodes_by_id.get(node_id)
                     if node:
-                        for match in result['matches']:
-                            snippet = self._create_grep_snippet(
-                                match['line_content'], 
-                                query, 
-                                max_length=200
-                            )
-                            
-                            # Calculate relevance based on number of matches and position
-                            relevance = min(1.0, result['total_matches'] * 0.1 + 0.5)
-                            
-                            all_results.append(UnifiedSearchResult(
-                                content=match['context'],
-                                title=node.title,
-                                category=node.category,
-                                source_type="grep",
-                                relevance_score=relevance,
-                                node_id=result['node_id'],
-                                file_path=result['file_path'],
-                                line_number=match['line_number'],
-                                context=match['context'],
-                                snippet=snippet,
-                                metadata={
-                                    "total_matches": result['total_matches'],
-                                    "line_number": match['line_number'],
-                                    "search_type": "grep"
-                                }
-                            ))
-                
-            except Exception as e:
-                print(f"Error in grep search: {e}")
-        
-        # 3. Title Search
-        if include_title:
-            query_lower = query.lower()
-            for node in self.nodes_by_id.values():
-                if query_lower in node.title.lower():
-                    # Calculate relevance based on how much of title matches
-                    title_lower = node.title.lower()
-                    if title_lower == query_lower:
-                        relevance = 1.0
-                    elif title_lower.startswith(query_lower):
-                        relevance = 0.9
-                    else:
-                        relevance = 0.7
-                    
-                    snippet = self._create_title_snippet(node.title, query, max_length=200)
-                    
-                    all_results.append(UnifiedSearchResult(
-                        content=node.content[:300] + "..." if len(node.content) > 300 else node.content,
-                        title=node.title,
-                        category=node.category,
-                        source_type="title",
-                        relevance_score=relevance,
-                        node_id=node.id,
-                        file_path=node.file_path,
-                        snippet=snippet,
-                        metadata={"search_type": "title"}
-                    ))
-        
-        # 4. Tag Search
-        if include_tag:
-            query_lower = query.lower()
-            # Remove # if present in query
-            clean_query = query_lower.replace('#', '')
-            
-            for tag, node_ids in self.tag_index.items():
-                if clean_query in tag.lower():
-                    relevance = 1.0 if tag.lower() == clean_query else 0.8
-                    
-                    for node_id in node_ids:
-                        node = self.nodes_by_id.get(node_id)
-                        if node:
-                            snippet = f"Tagged with: #{tag}"
-                            
-                            all_results.append(UnifiedSearchResult(
-                                content=node.content[:300] + "..." if len(node.content) > 300 else node.content,
-                                title=node.title,
-                                category=node.category,
-                                source_type="tag",
-                                relevance_score=relevance,
-                                node_id=node_id,
-                                file_path=node.file_path,
-                                snippet=snippet,
-                                metadata={"tag": tag, "search_type": "tag"}
-                            ))
-        
-        # 5. Remove duplicates and sort by relevance
-        unique_results = {}
-        for result in all_results:
-            # Use node_id + source_type as key to allow same node from different search types
-            key = f"{result.node_id}_{result.source_type}"
-            if key not in unique_results or result.relevance_score > unique_results[key].relevance_score:
-                unique_results[key] = result
-        
-        # Sort by relevance score (descending) and return top results
-        sorted_results = sorted(unique_results.values(), key=lambda x: x.relevance_score, reverse=True)
-        return sorted_results[:limit]
+                        snippet = f"Tagged with: #{tag}"
+                        
+                        results_out.append(UnifiedSearchResult(
+                            content=node.content[:300] + "..." if len(node.content) > 300 else node.content,
+                            title=node.title,
+                            category=node.category,
+                            source_type="tag",
+                            relevance_score=relevance,
+                            node_id=node_id,
+                            file_path=node.file_path,
+                            snippet=snippet,
+                            metadata={"tag": tag, "search_type": "tag"}
+                        ))
+        
+        return results_out
     
     def _create_semantic_snippet(self, content: str, query: str, max_length: int = 200) -> str:
         """Create a snippet highlighting the most relevant part for semantic search"""
         # Find the part of content that best matches the query
-        query_words = query.lower().split()
-        sentences = re.split(r'[.!?]+', content)
+        query_words = set(_WORD_RE.findall(query.lower()))
         
         best_sentence = ""
         best_score = 0
+        max_score = len(query_words)
+        
+        # No sentence can score above zero without query words, so skip the walk
+        sentences = _SNIPPET_SENT_RE.split(content) if max_score else ()
         
         for sentence in sentences:
             sentence = sentence.strip()
             if len(sentence) < 10:
                 continue
-                
-            sentence_lower = sentence.lower()
-            score = sum(1 for word in query_words if word in sentence_lower)
+            
+            score = len(query_words.intersection(_WORD_RE.findall(sentence.lower())))
             
             if score > best_score:
                 best_score = score
                 best_sentence = sentence
+                if best_score == max_score:
+                    # Every query word matched; later sentences can only tie
+                    break
         
         if best_sentence:
             if len(best_sentence) > max_length:
@@ -1234,7 +2113,7 @@ class EnhancedKnowledgeGraph:
                     snippet = snippet + "..."
                 
                 return snippet
-        except:
+        except re.error:
             pass
         
         # Fallback to simple truncation
@@ -6,100 +6,32 @@ Monitors markdown files for changes and updates the graph incrementally
 import os
 import asyncio
 from pathlib import Path
-from typing import Dict, Set, Optional, Callable
-from watchdog.observers import Observer
-from watchdog.events import FileSystemEventHandler, FileSystemEvent
-import time
+from typing import Dict, Set, Optional
+from watchfiles import awatch, Change
 from datetime import datetime
-import threading
 
 from .enhanced_knowledge_graph import get_enhanced_knowledge_graph
 from .markdown_parser import get_markdown_parser
+from .hash_utils import calculate_file_hash, invalidate_file_hash
 
-class MarkdownFileHandler(FileSystemEventHandler):
-    """Handler for markdown file changes"""
-    
-    def __init__(self, callback: Callable[[str, str], None]):
-        super().__init__()
-        self.callback = callback
-        self.debounce_time = 2.0  # Debounce file changes for 2 seconds
-        self.pending_changes: Dict[str, float] = {}
-        self.debounce_timer = None
-        
-    def on_modified(self, event: FileSystemEvent):
-        """Handle file modifications"""
-        if event.is_directory:
-            return
-            
-        file_path = event.src_path
-        if file_path.endswith(('.md', '.markdown')):
-            self._debounce_change(file_path, 'modified')
-    
-    def on_created(self, event: FileSystemEvent):
-        """Handle file creation"""
-        if event.is_directory:
-            return
-            
-        file_path = event.src_path
-        if file_path.endswith(('.md', '.markdown')):
-            self._debounce_change(file_path, 'created')
-    
-    def on_deleted(self, event: FileSystemEvent):
-        """Handle file deletion"""
-        if event.is_directory:
-            return
-            
-        file_path = event.src_path
-        if file_path.endswith(('.md', '.markdown')):
-            self._debounce_change(file_path, 'deleted')
-    
-    def on_moved(self, event: FileSystemEvent):
-        """Handle file moves/renames"""
-        if event.is_directory:
-            return
-            
-        if hasattr(event, 'dest_path'):
-            # Handle rename
-            old_path = event.src_path
-            new_path = event.dest_path
-            
-            if old_path.endswith(('.md', '.markdown')):
-                self._debounce_change(old_path, 'deleted')
-            if new_path.endswith(('.md', '.markdown')):
-                self._debounce_change(new_path, 'created')
-    
-    def _debounce_change(self, file_path: str, change_type: str):
-        """Debounce file changes to avoid excessive updates"""
-        current_time = time.time()
-        self.pending_changes[file_path] = current_time
-        
-        # Cancel existing timer
-        if self.debounce_timer:
-            self.debounce_timer.cancel()
-        
-        # Start new timer
-        self.debounce_timer = threading.Timer(
-            self.debounce_time,
-            self._process_pending_changes
-        )
-        self.debounce_timer.start()
-    
-    def _process_pending_changes(self):
-        """Process all pending changes"""
-        current_time = time.time()
-        
-        for file_path, change_time in list(self.pending_changes.items()):
-            if current_time - change_time >= self.debounce_time:
-                # Process the change
-                self.callback(file_path, 'modified')  # Simplified to just 'modified'
-                del self.pending_changes[file_path]
+_MARKDOWN_SUFFIXES = frozenset({'.md', '.markdown'})
+
+_CHANGE_TYPES = {
+    Change.added: 'created',
+    Change.modified: 'modified',
+    Change.deleted: 'deleted',
+}
+
+def _is_markdown_change(change: Change, path: str) -> bool:
+    """watchfiles filter: only markdown files are of interest"""
+    return os.path.splitext(path)[1].lower() in _MARKDOWN_SUFFIXES
 
 class KnowledgeGraphWatcher:
     """Monitors markdown files and updates the knowledge graph incrementally"""
     
     def __init__(self, notes_directory: str = None):
         self.notes_directory = Path(notes_directory or os.getenv("NOTES_DIRECTORY", "./notes"))
-        self.observer = Observer()
+        self._resolved_notes_directory = self.notes_directory.resolve()
         self.is_running = False
         self.graph = get_enhanced_knowledge_graph()
         self.parser = get_markdown_parser()
@@ -107,7 +39,12 @@ class KnowledgeGraphWatcher:
         # Statistics
         self.files_processed = 0
         self.last_update_time = None
-        self.processing_queue = asyncio.Queue()
+        # Latest change type per file path still to process; _wake tells the worker it has work
+        self._pending_paths: Dict[str, str] = {}
+        self._wake = asyncio.Event()
+        self._watch_task: Optional[asyncio.Task] = None
+        self._stop: Optional[asyncio.Event] = None
+        self._file_hashes: Dict[str, str] = {}  # file path -> hash of the last processed content
         
     async def start_watching(self):
         """Start monitoring the notes directory"""
@@ -117,21 +54,10 @@ class KnowledgeGraphWatcher:
         
         print(f"👀 Starting file watcher for: {self.notes_directory}")
         
-        # Create event handler
-        handler = MarkdownFileHandler(self._on_file_change)
-        
-        # Set up observer
-        self.observer.schedule(
-            handler,
-            str(self.notes_directory),
-            recursive=True
-        )
-        
-        # Start observer
-        self.observer.start()
+        # Start watching and processing queue
+        self._stop = asyncio.Event()
+        self._watch_task = asyncio.create_task(self._watch())
         self.is_running = True
-        
-        # Start processing queue
         asyncio.create_task(self._process_queue())
         
         print("✅ File watcher started successfully")
@@ -139,36 +65,91 @@ class KnowledgeGraphWatcher:
     def stop_watching(self):
         """Stop monitoring"""
         if self.is_running:
-            self.observer.stop()
-            self.observer.join()
+            if self._watch_task:
+                self._watch_task.cancel()
+                self._watch_task = None
+            if self._stop:
+                self._stop.set()
             self.is_running = False
+            
+            # Write out anything the graph's periodic flush hasn't saved yet
+            if self.graph.dirty:
+                try:
+                    asyncio.get_running_loop().create_task(self.graph._save_graph())
+                except RuntimeError:
+                    asyncio.run(self.graph._save_graph())
+            
             print("🛑 File watcher stopped")
     
+    async def _watch(self):
+        """Feed batches of filesystem changes to the processing worker"""
+        # watchfiles groups and de-duplicates events natively; step is the quiet time (ms) before yielding
+        try:
+            async for changes in awatch(self.notes_directory, watch_filter=_is_markdown_change, step=500, stop_event=self._stop):
+                change_types: Dict[str, Set[str]] = {}
+                for change, file_path in changes:
+                    change_types.setdefault(self._graph_path(file_path), set()).add(_CHANGE_TYPES[change])
+                
+                for file_path, types in change_types.items():
+                    if len(types) == 1:
+                        change_type = types.pop()
+                    else:
+                        # Deleted and recreated (or the reverse) within one batch: the disk decides
+                        change_type = 'modified' if os.path.exists(file_path) else 'deleted'
+                    self._on_file_change(file_path, change_type)
+        except Exception as e:
+            print(f"❌ File watcher error: {e}")
+    
+    def _graph_path(self, file_path: str) -> str:
+        """
+        Convert a path reported by watchfiles into the form the graph keys notes by
+        
+        watchfiles reports absolute, unnormalized paths (/cwd/./notes/a.md), while
+        path_to_id and node.file_path hold the configured directory joined with
+        the note's relative path (notes/a.md).
+        """
+        try:
+            relative_path = Path(file_path).resolve().relative_to(self._resolved_notes_directory)
+        except ValueError:
+            # Reached through a symlink pointing outside the notes directory
+            return file_path
+        return str(self.notes_directory / relative_path)
+    
     def _on_file_change(self, file_path: str, change_type: str):
         """Handle file change event"""
-        # Add to processing queue
-        try:
-            self.processing_queue.put_nowait((file_path, change_type))
-        except asyncio.QueueFull:
-            print(f"⚠️  Processing queue full, skipping: {file_path}")
+        # A path already pending just takes the newer change type
+        self._pending_paths[file_path] = change_type
+        self._wake.set()
     
     async def _process_queue(self):
-        """Process file changes from the queue"""
-        while self.is_running:
-            try:
-                file_path, change_type = await asyncio.wait_for(
-                    self.processing_queue.get(),
-                    timeout=1.0
-                )
-                
-                await self._process_file_change(file_path, change_type)
-                self.files_processed += 1
-                self.last_update_time = datetime.now()
+        """Process file changes from the queue until stop_watching is called"""
+        stop_task = asyncio.ensure_future(self._stop.wait())
+        try:
+            while True:
+                # Wait for the next change or the stop signal, whichever comes first
+                wake_task = asyncio.ensure_future(self._wake.wait())
+                await asyncio.wait({wake_task, stop_task}, return_when=asyncio.FIRST_COMPLETED)
+                if not wake_task.done():
+                    wake_task.cancel()
+                    return
                 
-            except asyncio.TimeoutError:
-                continue
-            except Exception as e:
-                print(f"Error processing file change: {e}")
+                try:
+                    # Take every pending path with its latest change; new changes collect in a fresh dict
+                    self._wake.clear()
+                    batch, self._pending_paths = self._pending_paths, {}
+                    await self._process_batch(batch)
+                    
+                except Exception as e:
+                    print(f"Error processing file change: {e}")
+        finally:
+            stop_task.cancel()
+    
+    async def _process_batch(self, batch: Dict[str, str]):
+        """Apply a batch of file changes"""
+        for file_path, change_type in batch.items():
+            await self._process_file_change(file_path, change_type)
+            self.files_processed += 1
+            self.last_update_time = datetime.now()
     
     async def _process_file_change(self, file_path: str, change_type: str):
         """Process a single file change"""
@@ -187,12 +168,11 @@ class KnowledgeGraphWatcher:
         """Handle file deletion"""
         print(f"🗑️  File deleted: {file_path}")
         
+        self._file_hashes.pop(str(file_path), None)
+        invalidate_file_hash(file_path)
+        
         # Find node ID for this file
-        node_id = None
-        for node in self.graph.nodes_by_id.values():
-            if node.file_path == str(file_path):
-                node_id = node.id
-                break
+        node_id = self.graph.path_to_id.get(str(file_path))
         
         if node_id:
             # Remove from graph
@@ -203,7 +183,22 @@ class KnowledgeGraphWatcher:
     
     async def _handle_file_update(self, file_path: Path):
         """Handle file creation or modification"""
-        if not file_path.exists():
+        try:
+            stat = os.stat(file_path)
+        except FileNotFoundError:
+            return
+        
+        # Skip files whose stat matches the one the node was built from
+        existing_node = self.graph.nodes_by_id.get(self.graph.path_to_id.get(str(file_path)))
+        if existing_node and (existing_node.file_mtime_ns, existing_node.file_size) == (stat.st_mtime_ns, stat.st_size):
+            return
+        
+        # Editors often touch a file without changing it; skip parsing identical bytes.
+        # Without a node (a failed add, or indexes cleared since) the file must be parsed again.
+        file_hash = calculate_file_hash(file_path)
+        if existing_node and file_hash is not None and self._file_hashes.get(str(file_path)) == file_hash:
+            existing_node.file_mtime_ns, existing_node.file_size = stat.st_mtime_ns, stat.st_size
+            self.graph._touch_node(existing_node)
             return
         
         print(f"📝 File updated: {file_path}")
@@ -212,13 +207,6 @@ class KnowledgeGraphWatcher:
             # Parse the file
             parsed_note = self.parser.parse_file(file_path)
             
-            # Check if node already exists
-            existing_node = None
-            for node in self.graph.nodes_by_id.values():
-                if node.file_path == str(file_path):
-                    existing_node = node
-                    break
-            
             if existing_node:
                 # Check if content actually changed
                 if existing_node.content_hash != parsed_note.content_hash:
@@ -226,76 +214,47 @@ class KnowledgeGraphWatcher:
                     await self._update_existing_node(existing_node, parsed_note)
                 else:
                     print(f"   ⚡ No content change, skipping: {existing_node.title}")
+                    existing_node.file_mtime_ns, existing_node.file_size = stat.st_mtime_ns, stat.st_size
+                    self.graph._touch_node(existing_node)
             else:
                 # Create new node
                 print(f"   ✨ Creating new node: {parsed_note.title}")
                 await self._create_new_node(file_path, parsed_note)
+            
+            # Only remember the bytes once a node was actually built from them
+            if file_hash is not None and self.graph.path_to_id.get(str(file_path)) in self.graph.nodes_by_id:
+                self._file_hashes[str(file_path)] = file_hash
+            else:
+                self._file_hashes.pop(str(file_path), None)
                 
         except Exception as e:
             print(f"   ❌ Error processing file: {e}")
     
     async def _remove_node_from_graph(self, node_id: str):
         """Remove a node and all its edges from the graph"""
-        # Remove from various indexes
-        if node_id in self.graph.nodes_by_id:
-            node = self.graph.nodes_by_id[node_id]
-            
-            # Remove from title mapping
-            if node.title in self.graph.title_to_id:
-                del self.graph.title_to_id[node.title]
-            
-            # Remove from category index
-            if node.category in self.graph.category_index:
-                self.graph.category_index[node.category].discard(node_id)
-            
-            # Remove from tag index
-            for tag in node.tags:
-                if tag in self.graph.tag_index:
-                    self.graph.tag_index[tag].discard(node_id)
-            
-            # Remove from hierarchy index
-            if node.parent_id in self.graph.hierarchy_index:
-                self.graph.hierarchy_index[node.parent_id].discard(node_id)
-            
-            # Remove from nodes
-            del self.graph.nodes_by_id[node_id]
-        
-        # Remove all edges involving this node
-        edges_to_remove = []
-        for edge_id, edge in self.graph.edges_by_id.items():
-            if edge.source_id == node_id or edge.target_id == node_id:
-                edges_to_remove.append(edge_id)
-        
-        for edge_id in edges_to_remove:
-            del self.graph.edges_by_id[edge_id]
-        
-        # Remove from ChromaDB
-        try:
-            self.graph.collection.delete(ids=[node_id])
-        except Exception as e:
-            print(f"   ⚠️  Error removing from ChromaDB: {e}")
+        await self.graph._remove_node(node_id)
         
-        # Save graph
-        await self.graph._save_graph()
+        # Leave the save to the graph's periodic flush
+        self.graph.dirty = True
     
     async def _update_existing_node(self, existing_node, parsed_note):
         """Update an existing node with new content"""
-        # Remove old node
-        await self._remove_node_from_graph(existing_node.id)
+        # Patch the node and the links around it in place
+        await self.graph._replace_node(existing_node, parsed_note)
         
-        # Add updated node
-        await self._create_new_node(Path(existing_node.file_path), parsed_note)
+        # Leave the save to the graph's periodic flush
+        self.graph.dirty = True
     
     async def _create_new_node(self, file_path: Path, parsed_note):
         """Create a new node from a parsed note"""
         # Add to graph using the enhanced knowledge graph method
         await self.graph._add_parsed_note(file_path, parsed_note)
         
-        # Resolve wiki-links for this note
-        await self.graph._resolve_wiki_links()
+        # Resolve this note's links and any dangling links that now point at it
+        self.graph._resolve_wiki_links_for(parsed_note.id, parsed_note.wiki_links)
         
-        # Save graph
-        await self.graph._save_graph()
+        # Leave the save to the graph's periodic flush
+        self.graph.dirty = True
     
     def get_statistics(self) -> Dict:
         """Get file watcher statistics"""
@@ -303,7 +262,7 @@ class KnowledgeGraphWatcher:
             'is_running': self.is_running,
             'files_processed': self.files_processed,
             'last_update_time': self.last_update_time.isoformat() if self.last_update_time else None,
-            'queue_size': self.processing_queue.qsize(),
+            'queue_size': len(self._pending_paths),
             'notes_directory': str(self.notes_directory)
         }
 
@@ -3,14 +3,27 @@ Hash utilities for content tracking and caching in the knowledge management syst
 """
 import hashlib
 import json
-from typing import Any, Dict, Optional
+import tempfile
+import orjson
+from typing import Any, Dict, Optional, Set, Tuple
 from datetime import datetime
 import os
+from functools import partial
+
+# Change-detection fingerprint (not used for security); same 64-char hex length as SHA-256
+_new_hash = partial(hashlib.blake2b, digest_size=32)
+
+# file path -> (st_mtime_ns, st_size, hash) of the last time the file was hashed
+_file_hash_cache: Dict[str, Tuple[int, int, str]] = {}
+
+# frozen metadata -> metadata hash; many notes share the same frontmatter
+_metadata_hash_cache: Dict[Any, str] = {}
+_METADATA_HASH_CACHE_SIZE = 2048
 
 
 def calculate_content_hash(content: str) -> str:
     """
-    Calculate SHA-256 hash of content for tracking changes
+    Calculate BLAKE2b hash of content for tracking changes
     
     Args:
         content: The content to hash
@@ -18,27 +31,87 @@ def calculate_content_hash(content: str) -> str:
     Returns:
         Hexadecimal hash string
     """
-    return hashlib.sha256(content.encode('utf-8')).hexdigest()
+    return _new_hash(content.encode('utf-8')).hexdigest()
 
 
 def calculate_file_hash(file_path: str) -> Optional[str]:
     """
     Calculate hash of a file's content
     
+    Hashes the raw bytes, so the result matches calculate_content_hash of the
+    decoded text for UTF-8 files with LF line endings. The file is only re-read
+    when its modification time or size differs from the last time it was hashed.
+    
     Args:
         file_path: Path to the file
         
     Returns:
         File content hash or None if file doesn't exist
     """
+    file_path = str(file_path)
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        return calculate_content_hash(content)
+        stat = os.stat(file_path)
+        cached = _file_hash_cache.get(file_path)
+        if cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size:
+            return cached[2]
+        
+        with open(file_path, 'rb') as f:
+            file_hash = _digest_file(f)
+        _file_hash_cache[file_path] = (stat.st_mtime_ns, stat.st_size, file_hash)
+        return file_hash
     except (FileNotFoundError, IOError):
+        _file_hash_cache.pop(file_path, None)
         return None
 
 
+def _digest_file(f) -> str:
+    """Hash of a binary file object, streamed rather than read into memory"""
+    if hasattr(hashlib, 'file_digest'):  # Python 3.11+
+        return hashlib.file_digest(f, _new_hash).hexdigest()
+    
+    digest = _new_hash()
+    while chunk := f.read(65536):
+        digest.update(chunk)
+    return digest.hexdigest()
+
+
+def write_json_atomic(file_path: str, data: Any):
+    """
+    Write JSON to a temp file in the same directory and swap it into place
+    
+    Readers (and a crash mid-write) only ever see the old or the new file,
+    never a truncated one.
+    """
+    directory = os.path.dirname(file_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.' + os.path.basename(file_path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(orjson.dumps(data, default=str, option=orjson.OPT_NON_STR_KEYS))
+        os.replace(tmp_path, file_path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def shard_of(identifier: str) -> str:
+    """Snapshot shard name for an identifier: the first byte of its hash, in hex"""
+    return hashlib.blake2b(identifier.encode('utf-8'), digest_size=1).hexdigest()
+
+
+def invalidate_file_hash(file_path: str):
+    """
+    Forget the cached hash for a file so the next calculate_file_hash re-reads it
+    
+    Args:
+        file_path: Path to the file
+    """
+    _file_hash_cache.pop(str(file_path), None)
+
+
 def calculate_metadata_hash(metadata: Dict[str, Any]) -> str:
     """
     Calculate hash of metadata for tracking changes
@@ -49,9 +122,40 @@ def calculate_metadata_hash(metadata: Dict[str, Any]) -> str:
     Returns:
         Metadata hash string
     """
-    # Sort keys for consistent hashing
-    metadata_str = json.dumps(metadata, sort_keys=True, default=str)
-    return hashlib.sha256(metadata_str.encode('utf-8')).hexdigest()
+    try:
+        key = _freeze(metadata)
+        cached = _metadata_hash_cache.get(key)
+    except TypeError:  # Unhashable values; hash directly
+        key = cached = None
+    if cached is not None:
+        return cached
+    
+    metadata_hash = _new_hash(_canonical_metadata_bytes(metadata)).hexdigest()
+    
+    if key is not None:
+        if len(_metadata_hash_cache) >= _METADATA_HASH_CACHE_SIZE:
+            _metadata_hash_cache.clear()
+        _metadata_hash_cache[key] = metadata_hash
+    return metadata_hash
+
+
+def _canonical_metadata_bytes(metadata: Dict[str, Any]) -> bytes:
+    """Serialize metadata with sorted keys for consistent hashing"""
+    return json.dumps(metadata, sort_keys=True, default=str).encode('utf-8')
+
+
+def _freeze(value: Any) -> Any:
+    """
+    Hashable, order-insensitive view of metadata for memoizing its hash
+    
+    Scalars keep their type so values that compare equal but serialize
+    differently (1, 1.0, True) never share a cache entry.
+    """
+    if isinstance(value, dict):
+        return frozenset(((k.__class__, k), _freeze(v)) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return (value.__class__, value)
 
 
 def calculate_combined_hash(content: str, metadata: Dict[str, Any] = None) -> str:
@@ -65,65 +169,181 @@ def calculate_combined_hash(content: str, metadata: Dict[str, Any] = None) -> st
     Returns:
         Combined hash string
     """
-    content_hash = calculate_content_hash(content)
+    # Feed content and metadata through one hash state instead of hashing each
+    # separately and then hashing the two digests together
+    combined = _new_hash(content.encode('utf-8'))
     
     if metadata:
-        metadata_hash = calculate_metadata_hash(metadata)
-        combined = f"{content_hash}:{metadata_hash}"
-        return hashlib.sha256(combined.encode('utf-8')).hexdigest()
+        combined.update(b'\0')
+        combined.update(_canonical_metadata_bytes(metadata))
     
-    return content_hash
+    return combined.hexdigest()
 
 
 class HashTracker:
     """
     Manages hash tracking for content and files
+    
+    Individual updates are appended to a JSONL log next to the cache file;
+    the JSON snapshots are only rewritten when the log is compacted. The hash
+    cache snapshot is split into 256 shards by identifier hash so compaction
+    only rewrites the shards that changed.
     """
     
+    # Compact the update log into the snapshots once it has this many entries
+    COMPACT_AFTER = 1000
+    
     def __init__(self, cache_file: str = ".knowledge_base/hash_cache.json"):
         self.cache_file = cache_file
+        self._log_entries = 0
+        self._dirty_shards: Set[str] = set()
         self.hash_cache = self._load_cache()
         self.note_to_node_mapping = self._load_mapping()
     
+    @property
+    def log_file(self) -> str:
+        """Append-only log of updates made since the last compaction"""
+        return self.cache_file + '.log'
+    
+    @property
+    def cache_dir(self) -> str:
+        """Directory holding the hash cache shards (hash_cache/00.json .. ff.json)"""
+        return os.path.splitext(self.cache_file)[0]
+    
+    def _read_log(self):
+        """Yield the entries in the update log, skipping a torn trailing line"""
+        try:
+            with open(self.log_file, 'rb') as f:
+                for line in f:
+                    try:
+                        yield orjson.loads(line)
+                    except orjson.JSONDecodeError:
+                        continue
+        except FileNotFoundError:
+            return
+        except IOError as e:
+            print(f"Warning: Could not read hash cache log: {e}")
+    
+    def _append_log(self, entry: Dict[str, Any]):
+        """Record a single update in the log, compacting when it grows too long"""
+        try:
+            os.makedirs(os.path.dirname(self.log_file), exist_ok=True)
+            with open(self.log_file, 'ab') as f:
+                f.write(orjson.dumps(entry, default=str) + b'\n')
+            self._log_entries += 1
+        except IOError as e:
+            print(f"Warning: Could not write hash cache log: {e}")
+            # Fall back to persisting everything directly
+            self.compact()
+            return
+        
+        if self._log_entries >= self.COMPACT_AFTER:
+            self.compact()
+    
+    def compact(self):
+        """Rewrite the snapshots from memory and truncate the update log"""
+        # Evaluate both so the mapping is saved even when the cache shards fail
+        cache_saved = self._save_cache()
+        mapping_saved = self._save_mapping()
+        if not (cache_saved and mapping_saved):
+            # The log still holds updates the snapshots lack; keep it for the next load
+            return
+        try:
+            if os.path.exists(self.log_file):
+                os.remove(self.log_file)
+            self._log_entries = 0
+        except IOError as e:
+            print(f"Warning: Could not truncate hash cache log: {e}")
+    
     def _load_cache(self) -> Dict[str, Dict[str, Any]]:
-        """Load hash cache from file"""
+        """Load hash cache shards, then replay logged updates"""
+        cache = {}
+        self._dirty_shards = set()
+        
+        # Single-file snapshot from before sharding: migrate it on the next compaction
         try:
             if os.path.exists(self.cache_file):
-                with open(self.cache_file, 'r') as f:
-                    return json.load(f)
-        except (json.JSONDecodeError, IOError):
+                with open(self.cache_file, 'rb') as f:
+                    cache = orjson.loads(f.read())
+                self._dirty_shards.update(shard_of(identifier) for identifier in cache)
+        except (orjson.JSONDecodeError, IOError):
             pass
-        return {}
+        
+        try:
+            shard_files = [name for name in os.listdir(self.cache_dir) if name.endswith('.json')]
+        except FileNotFoundError:
+            shard_files = []
+        for name in shard_files:
+            try:
+                with open(os.path.join(self.cache_dir, name), 'rb') as f:
+                    cache.update(orjson.loads(f.read()))
+            except (orjson.JSONDecodeError, IOError) as e:
+                print(f"Warning: Could not load hash cache shard {name}: {e}")
+        
+        # Logged updates are not in any shard yet
+        self._log_entries = 0
+        for entry in self._read_log():
+            self._log_entries += 1
+            if entry.get('op') == 'set':
+                cache[entry['id']] = entry['entry']
+                self._dirty_shards.add(shard_of(entry['id']))
+        return cache
     
-    def _save_cache(self):
-        """Save hash cache to file"""
+    def _save_cache(self) -> bool:
+        """Rewrite the hash cache shards that changed since the last save, returning whether it succeeded"""
+        if not self._dirty_shards:
+            return True
+        
+        shards: Dict[str, Dict[str, Any]] = {shard: {} for shard in self._dirty_shards}
+        for identifier, entry in self.hash_cache.items():
+            shard = shard_of(identifier)
+            if shard in shards:
+                shards[shard][identifier] = entry
+        
         try:
-            os.makedirs(os.path.dirname(self.cache_file), exist_ok=True)
-            with open(self.cache_file, 'w') as f:
-                json.dump(self.hash_cache, f, indent=2, default=str)
+            for shard, entries in shards.items():
+                shard_file = os.path.join(self.cache_dir, shard + '.json')
+                if entries:
+                    write_json_atomic(shard_file, entries)
+                elif os.path.exists(shard_file):
+                    os.remove(shard_file)
+                self._dirty_shards.discard(shard)
+            
+            # Everything from a pre-sharding snapshot now lives in the shards
+            if os.path.exists(self.cache_file):
+                os.remove(self.cache_file)
         except IOError as e:
             print(f"Warning: Could not save hash cache: {e}")
+            return False
+        return True
     
     def _load_mapping(self) -> Dict[str, str]:
-        """Load note to knowledge node mapping"""
+        """Load note to knowledge node mapping, then replay logged updates"""
         mapping_file = self.cache_file.replace('hash_cache.json', 'note_mapping.json')
+        mapping = {}
         try:
             if os.path.exists(mapping_file):
-                with open(mapping_file, 'r') as f:
-                    return json.load(f)
-        except (json.JSONDecodeError, IOError):
+                with open(mapping_file, 'rb') as f:
+                    mapping = orjson.loads(f.read())
+        except (orjson.JSONDecodeError, IOError):
             pass
-        return {}
+        
+        for entry in self._read_log():
+            if entry.get('op') == 'map':
+                mapping[entry['note']] = entry['node']
+            elif entry.get('op') == 'unmap':
+                mapping.pop(entry['note'], None)
+        return mapping
     
-    def _save_mapping(self):
-        """Save note to knowledge node mapping"""
+    def _save_mapping(self) -> bool:
+        """Save note to knowledge node mapping, returning whether it succeeded"""
         mapping_file = self.cache_file.replace('hash_cache.json', 'note_mapping.json')
         try:
-            os.makedirs(os.path.dirname(mapping_file), exist_ok=True)
-            with open(mapping_file, 'w') as f:
-                json.dump(self.note_to_node_mapping, f, indent=2)
+            write_json_atomic(mapping_file, self.note_to_node_mapping)
         except IOError as e:
             print(f"Warning: Could not save note mapping: {e}")
+            return False
+        return True
     
     def get_cached_hash(self, identifier: str) -> Optional[str]:
         """
@@ -149,12 +369,14 @@ class HashTracker:
             content_hash: Content hash
             metadata: Optional metadata
         """
-        self.hash_cache[identifier] = {
+        entry = {
             'hash': content_hash,
             'updated_at': datetime.now().isoformat(),
             'metadata': metadata or {}
         }
-        self._save_cache()
+        self.hash_cache[identifier] = entry
+        self._dirty_shards.add(shard_of(identifier))
+        self._append_log({'op': 'set', 'id': identifier, 'entry': entry})
     
     def has_content_changed(self, identifier: str, current_content: str) -> bool:
         """
@@ -195,7 +417,7 @@ class HashTracker:
             node_id: Knowledge node ID
         """
         self.note_to_node_mapping[note_path] = node_id
-        self._save_mapping()
+        self._append_log({'op': 'map', 'note': note_path, 'node': node_id})
     
     def remove_note_mapping(self, note_path: str):
         """
@@ -206,7 +428,7 @@ class HashTracker:
         """
         if note_path in self.note_to_node_mapping:
             del self.note_to_node_mapping[note_path]
-            self._save_mapping()
+            self._append_log({'op': 'unmap', 'note': note_path})
     
     def get_cache_stats(self) -> Dict[str, Any]:
         """
@@ -219,6 +441,7 @@ class HashTracker:
             'total_cached_items': len(self.hash_cache),
             'total_mapped_notes': len(self.note_to_node_mapping),
             'cache_file': self.cache_file,
+            'cache_dir': self.cache_dir,
             'last_updated': max(
                 (entry.get('updated_at', '') for entry in self.hash_cache.values()),
                 default='Never'
@@ -227,10 +450,10 @@ class HashTracker:
     
     def clear_cache(self):
         """Clear all cache data"""
+        self._dirty_shards.update(shard_of(identifier) for identifier in self.hash_cache)
         self.hash_cache.clear()
         self.note_to_node_mapping.clear()
-        self._save_cache()
-        self._save_mapping()
+        self.compact()
     
     def cleanup_stale_entries(self, valid_identifiers: set):
         """
@@ -242,14 +465,14 @@ class HashTracker:
         stale_keys = set(self.hash_cache.keys()) - valid_identifiers
         for key in stale_keys:
             del self.hash_cache[key]
+            self._dirty_shards.add(shard_of(key))
         
         stale_mappings = set(self.note_to_node_mapping.keys()) - valid_identifiers
         for key in stale_mappings:
             del self.note_to_node_mapping[key]
         
         if stale_keys or stale_mappings:
-            self._save_cache()
-            self._save_mapping()
+            self.compact()
             print(f"Cleaned up {len(stale_keys)} stale cache entries and {len(stale_mappings)} stale mappings")
 
 
@@ -4,15 +4,23 @@ Supports wiki-links, YAML front-matter, and typed relationships
 Following best practices for "second brain" / PKM systems
 """
 
+import os
 import re
 import yaml
-from typing import Dict, List, Set, Optional, Tuple, NamedTuple
+import asyncio
+import multiprocessing
+from typing import AbstractSet, Any, Dict, FrozenSet, List, Set, Optional, Tuple, NamedTuple
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from datetime import datetime
 import hashlib
 from dataclasses import dataclass, field
 from enum import Enum
 
+# libyaml's loader and emitter when PyYAML was built with it, otherwise the pure-Python ones
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
 class RelationType(Enum):
     """Typed relationship enum for semantic clarity"""
     PARENT_OF = "parent_of"
@@ -26,7 +34,30 @@ class RelationType(Enum):
     IMPLEMENTS = "implements"
     EXAMPLE_OF = "example_of"
 
-@dataclass
+_INVERSE_RELATIONS = {
+    RelationType.PARENT_OF: RelationType.CHILD_OF,
+    RelationType.CHILD_OF: RelationType.PARENT_OF,
+    RelationType.SUPPORTS: RelationType.CONTRADICTS,
+    RelationType.CONTRADICTS: RelationType.SUPPORTS,
+    RelationType.DEPENDS_ON: RelationType.REFERENCES,  # Approximate
+    RelationType.REFERENCES: RelationType.DEPENDS_ON,  # Approximate
+    RelationType.EXTENDS: RelationType.RELATED_TO,      # Approximate
+    RelationType.IMPLEMENTS: RelationType.RELATED_TO,   # Approximate
+    RelationType.EXAMPLE_OF: RelationType.RELATED_TO,   # Approximate
+}
+
+# Folder name fragments and the category of the notes under them, in match order
+_FOLDER_CATEGORIES = (
+    ('ideas', 'Ideas to Develop'),
+    ('personal', 'Personal'),
+    ('research', 'Research'),
+    ('reading-list', 'Reading List'),
+    ('projects', 'Projects'),
+    ('learning', 'Learning'),
+    ('quick-notes', 'Quick Notes'),
+)
+
+@dataclass(slots=True)
 class WikiLink:
     """Represents a wiki-style link [[target|display]]"""
     target: str
@@ -38,7 +69,7 @@ class WikiLink:
         if not self.display:
             self.display = self.target
 
-@dataclass
+@dataclass(slots=True)
 class Relationship:
     """Represents a typed relationship between notes"""
     source_id: str
@@ -49,20 +80,9 @@ class Relationship:
     @property
     def inverse_relation(self) -> RelationType:
         """Get the inverse relationship type"""
-        inverse_map = {
-            RelationType.PARENT_OF: RelationType.CHILD_OF,
-            RelationType.CHILD_OF: RelationType.PARENT_OF,
-            RelationType.SUPPORTS: RelationType.CONTRADICTS,
-            RelationType.CONTRADICTS: RelationType.SUPPORTS,
-            RelationType.DEPENDS_ON: RelationType.REFERENCES,  # Approximate
-            RelationType.REFERENCES: RelationType.DEPENDS_ON,  # Approximate
-            RelationType.EXTENDS: RelationType.RELATED_TO,      # Approximate
-            RelationType.IMPLEMENTS: RelationType.RELATED_TO,   # Approximate
-            RelationType.EXAMPLE_OF: RelationType.RELATED_TO,   # Approximate
-        }
-        return inverse_map.get(self.relation_type, RelationType.RELATED_TO)
+        return _INVERSE_RELATIONS.get(self.relation_type, RelationType.RELATED_TO)
 
-@dataclass
+@dataclass(slots=True)
 class ParsedNote:
     """Comprehensive note representation with relationships"""
     content: str
@@ -85,13 +105,24 @@ class ParsedNote:
     
     def _calculate_content_hash(self) -> str:
         """Calculate deterministic hash of content"""
-        content_for_hash = f"{self.title}|{self.content}|{self.category}|{sorted(self.tags)}"
-        return hashlib.sha256(content_for_hash.encode()).hexdigest()[:16]
+        # Fed piecewise so the note body isn't copied into one concatenated string;
+        # an 8-byte digest keeps the previous 16-hex-character length
+        h = hashlib.blake2b(digest_size=8)
+        for part in (self.title, self.content, self.category):
+            h.update(str(part).encode('utf-8'))
+            h.update(b'|')
+        for tag in sorted(self.tags):
+            h.update(str(tag).encode('utf-8'))
+            h.update(b',')
+        return h.hexdigest()
     
     def _generate_deterministic_id(self) -> str:
         """Generate stable ID based on content hash"""
         return f"note_{self.content_hash}"
 
+# Returned for notes without links, so a miss allocates nothing and can't be mutated
+_NO_LINKS: FrozenSet[str] = frozenset()
+
 class LinkCache:
     """Fast O(1) backlink queries following PKM best practices"""
     
@@ -101,28 +132,35 @@ class LinkCache:
         self.link_metadata: Dict[Tuple[str, str], Dict] = {}  # (source, target) -> metadata
     
     def add_link(self, source_id: str, target_id: str, metadata: Dict = None):
-        """Add a link to the cache"""
+        """Add a link to the cache; repeats of a known link are ignored"""
         # Outgoing links
-        if source_id not in self.outgoing_links:
-            self.outgoing_links[source_id] = set()
-        self.outgoing_links[source_id].add(target_id)
+        targets = self.outgoing_links.setdefault(source_id, set())
+        if target_id in targets:
+            return
+        targets.add(target_id)
         
         # Incoming links (backlinks)
-        if target_id not in self.incoming_links:
-            self.incoming_links[target_id] = set()
-        self.incoming_links[target_id].add(source_id)
+        self.incoming_links.setdefault(target_id, set()).add(source_id)
         
         # Link metadata
         if metadata:
             self.link_metadata[(source_id, target_id)] = metadata
     
-    def get_outgoing_links(self, note_id: str) -> Set[str]:
+    def get_outgoing_links(self, note_id: str) -> AbstractSet[str]:
         """Get all outgoing links from a note"""
-        return self.outgoing_links.get(note_id, set())
+        return self.outgoing_links.get(note_id, _NO_LINKS)
     
-    def get_incoming_links(self, note_id: str) -> Set[str]:
+    def get_incoming_links(self, note_id: str) -> AbstractSet[str]:
         """Get all incoming links to a note (backlinks)"""
-        return self.incoming_links.get(note_id, set())
+        return self.incoming_links.get(note_id, _NO_LINKS)
+    
+    def count_outgoing_links(self, note_id: str) -> int:
+        """Number of outgoing links from a note"""
+        return len(self.outgoing_links.get(note_id, _NO_LINKS))
+    
+    def count_incoming_links(self, note_id: str) -> int:
+        """Number of incoming links to a note (backlinks)"""
+        return len(self.incoming_links.get(note_id, _NO_LINKS))
     
     def get_link_metadata(self, source_id: str, target_id: str) -> Dict:
         """Get metadata for a specific link"""
@@ -135,6 +173,9 @@ class LinkCache:
             for target in self.outgoing_links[note_id]:
                 if target in self.incoming_links:
                     self.incoming_links[target].discard(note_id)
+                    # incoming_links only holds notes that still have backlinks
+                    if not self.incoming_links[target]:
+                        del self.incoming_links[target]
                 # Remove metadata
                 self.link_metadata.pop((note_id, target), None)
             del self.outgoing_links[note_id]
@@ -150,46 +191,113 @@ class LinkCache:
     
     def find_orphans(self) -> Set[str]:
         """Find notes with no incoming links"""
-        all_notes = set(self.outgoing_links.keys()) | set(self.incoming_links.keys())
-        return all_notes - set(self.incoming_links.keys())
+        return self.outgoing_links.keys() - self.incoming_links.keys()
     
     def find_broken_links(self, valid_note_ids: Set[str]) -> List[Tuple[str, str]]:
         """Find links to non-existent notes"""
         broken = []
         for source_id, targets in self.outgoing_links.items():
-            for target in targets:
-                if target not in valid_note_ids:
-                    broken.append((source_id, target))
+            # Set difference runs in C; only sources with missing targets reach Python
+            missing = targets - valid_note_ids
+            if missing:
+                broken.extend((source_id, target) for target in missing)
         return broken
 
 class MarkdownParser:
     """Advanced markdown parser with PKM features"""
     
+    # parse_files only starts worker processes for at least this many files
+    PARALLEL_PARSE_MIN_FILES = 64
+    # Concurrent file reads per CPU in parse_files_async
+    ASYNC_READS_PER_CPU = 4
+    
     def __init__(self):
         self.link_cache = LinkCache()
         self.note_id_mapping: Dict[str, str] = {}  # title/path -> note_id
-        self.wiki_link_pattern = re.compile(r'\[\[([^\]]+)\]\]')
+        # [[target]] or [[target|display]]; the lookahead keeps [[]] from matching
+        self.wiki_link_pattern = re.compile(r'\[\[(?=[^\]])([^\]|]*)(?:\|([^\]]*))?\]\]')
         self.heading_pattern = re.compile(r'^(#{1,6})\s+(.+)$', re.MULTILINE)
-        self.tag_pattern = re.compile(r'#([a-zA-Z0-9_-]+)')
-        
-        # Typed relationship patterns
-        self.relationship_patterns = {
-            RelationType.PARENT_OF: re.compile(r'parent::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
-            RelationType.CHILD_OF: re.compile(r'child::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
-            RelationType.SUPPORTS: re.compile(r'supports::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
-            RelationType.CONTRADICTS: re.compile(r'contradicts::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
-            RelationType.DEPENDS_ON: re.compile(r'depends::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
-            RelationType.REFERENCES: re.compile(r'references::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
-            RelationType.EXTENDS: re.compile(r'extends::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
-            RelationType.IMPLEMENTS: re.compile(r'implements::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
-            RelationType.EXAMPLE_OF: re.compile(r'example::\s*\[\[([^\]]+)\]\]', re.IGNORECASE),
+        self.tag_pattern = re.compile(r'#([a-zA-Z0-9_-]+)', re.ASCII)
+        
+        # Typed relationships are written as keyword:: [[Target]]
+        self.relationship_keywords = {
+            'parent': RelationType.PARENT_OF,
+            'child': RelationType.CHILD_OF,
+            'supports': RelationType.SUPPORTS,
+            'contradicts': RelationType.CONTRADICTS,
+            'depends': RelationType.DEPENDS_ON,
+            'references': RelationType.REFERENCES,
+            'extends': RelationType.EXTENDS,
+            'implements': RelationType.IMPLEMENTS,
+            'example': RelationType.EXAMPLE_OF,
         }
+        # One alternation over every keyword, so the body is scanned once rather than per type
+        self.relationship_pattern = re.compile(
+            r'(' + '|'.join(self.relationship_keywords) + r')::\s*\[\[([^\]]+)\]\]',
+            re.IGNORECASE
+        )
     
     def parse_file(self, file_path: Path, content: str = None) -> ParsedNote:
         """Parse a markdown file with all PKM features"""
         if content is None:
-            content = file_path.read_text(encoding='utf-8')
-        
+            content = self._read_note(file_path)
+        return self._build_note(file_path, self._scan_note(file_path, content))
+    
+    def parse_files(self, file_paths: List[Path]) -> List[Tuple[Path, ParsedNote]]:
+        """
+        Parse many markdown files, returning (path, note) for each one that parsed.
+        
+        Reading, front-matter and regex scanning run in worker processes for
+        large batches. Notes are then built here in the given order, because
+        relationship IDs depend on the titles of the notes parsed before them.
+        """
+        return self._build_notes(file_paths, self._scan_files(file_paths))
+    
+    async def parse_files_async(self, file_paths: List[Path]) -> List[Tuple[Path, ParsedNote]]:
+        """
+        parse_files without blocking the event loop.
+        
+        Large batches go to the worker processes from a thread; smaller ones are
+        read and scanned in threads so disk reads overlap. Notes are built on the
+        loop afterwards, so the note ID mapping and link cache see one writer.
+        """
+        if len(file_paths) >= self.PARALLEL_PARSE_MIN_FILES:
+            scans = await asyncio.to_thread(self._scan_files, file_paths)
+        else:
+            reads = asyncio.Semaphore((os.cpu_count() or 1) * self.ASYNC_READS_PER_CPU)
+            
+            async def scan(file_path: Path) -> Any:
+                async with reads:
+                    return await asyncio.to_thread(_scan_note_file, file_path)
+            
+            scans = await asyncio.gather(*(scan(file_path) for file_path in file_paths))
+        return self._build_notes(file_paths, scans)
+    
+    def _scan_files(self, file_paths: List[Path]) -> List[Any]:
+        """Scan notes in worker processes for large batches, serially otherwise"""
+        if len(file_paths) >= self.PARALLEL_PARSE_MIN_FILES:
+            try:
+                # Spawned workers: forking a process that already runs server and model threads can deadlock
+                with ProcessPoolExecutor(mp_context=multiprocessing.get_context("spawn")) as executor:
+                    return list(executor.map(_scan_note_file, file_paths, chunksize=32))
+            except Exception as e:
+                print(f"Warning: Parallel parsing unavailable, parsing serially: {e}")
+        return [_scan_note_file(file_path) for file_path in file_paths]
+    
+    def _build_notes(self, file_paths: List[Path], scans: List[Any]) -> List[Tuple[Path, ParsedNote]]:
+        """Build scanned notes in order, reporting the ones that failed"""
+        parsed_notes = []
+        for file_path, scan in zip(file_paths, scans):
+            try:
+                if isinstance(scan, Exception):
+                    raise scan
+                parsed_notes.append((file_path, self._build_note(file_path, scan)))
+            except Exception as e:
+                print(f"   ❌ Error parsing {file_path}: {e}")
+        return parsed_notes
+    
+    def _scan_note(self, file_path: Path, content: str) -> Tuple[Any, ...]:
+        """Parse the parts of a note that don't depend on other notes (safe to run in a worker process)"""
         # Parse YAML front-matter
         metadata, body_content = self._parse_frontmatter(content)
         
@@ -201,25 +309,33 @@ class MarkdownParser:
         # Parse wiki-links
         wiki_links = self._parse_wiki_links(body_content)
         
-        # Parse typed relationships
-        relationships = self._parse_relationships(body_content, title)
-        
-        # Extract hierarchy information
-        parent, children = self._extract_hierarchy(metadata, relationships)
+        return metadata, body_content, title, category, tags, wiki_links, self._find_relationships(body_content)
+    
+    def _build_note(self, file_path: Path, scan: Tuple[Any, ...]) -> ParsedNote:
+        """Finish a scanned note against the parser's note ID mapping and link cache"""
+        metadata, body_content, title, category, tags, wiki_links, relationship_matches = scan
         
-        # Create parsed note
+        # Create parsed note; its ID depends only on title, content, category and tags
         parsed_note = ParsedNote(
             content=body_content,
             metadata=metadata,
             wiki_links=wiki_links,
-            relationships=relationships,
             tags=tags,
             title=title,
-            category=category,
-            parent=parent,
-            children=children
+            category=category
         )
         
+        # Parse typed relationships, which originate at this note's ID
+        parsed_note.relationships = self._build_relationships(relationship_matches, title, parsed_note.id)
+        
+        # Extract hierarchy information
+        parsed_note.parent, parsed_note.children = self._extract_hierarchy(metadata, parsed_note.relationships)
+        
+        # Re-parsing an edited file yields a new ID; drop the links cached for the old version
+        previous_id = self.note_id_mapping.get(str(file_path))
+        if previous_id is not None and previous_id != parsed_note.id:
+            self.link_cache.remove_note(previous_id)
+        
         # Update link cache
         self._update_link_cache(parsed_note)
         
@@ -229,17 +345,30 @@ class MarkdownParser:
         
         return parsed_note
     
+    @staticmethod
+    def _read_note(file_path: Path) -> str:
+        """Read a note as text in one binary read and decode"""
+        # Skips the text-mode wrapper's chunked decoding; newlines are
+        # normalized as read_text's universal newline mode would
+        with open(file_path, 'rb') as f:
+            content = f.read().decode('utf-8')
+        if '\r' in content:
+            content = content.replace('\r\n', '\n').replace('\r', '\n')
+        return content
+    
     def _parse_frontmatter(self, content: str) -> Tuple[Dict, str]:
         """Parse YAML front-matter"""
         if not content.startswith('---'):
             return {}, content
         
+        # Locate the closing delimiter and slice once rather than splitting the whole note
+        end = content.find('---', 3)
+        if end < 0:
+            return {}, content
+        
         try:
-            parts = content.split('---', 2)
-            if len(parts) >= 3:
-                metadata = yaml.safe_load(parts[1]) or {}
-                body_content = parts[2].strip()
-                return metadata, body_content
+            metadata = yaml.load(content[3:end], Loader=_YamlLoader) or {}
+            return metadata, content[end + 3:].strip()
         except yaml.YAMLError as e:
             print(f"Warning: Invalid YAML front-matter: {e}")
         
@@ -265,25 +394,17 @@ class MarkdownParser:
             return metadata['category']
         
         # Determine from folder structure
-        categories = {
-            'ideas': 'Ideas to Develop',
-            'personal': 'Personal',
-            'research': 'Research',
-            'reading-list': 'Reading List',
-            'projects': 'Projects',
-            'learning': 'Learning',
-            'quick-notes': 'Quick Notes'
-        }
-        
-        for folder, category in categories.items():
-            if folder in str(file_path):
+        path = str(file_path)
+        for folder, category in _FOLDER_CATEGORIES:
+            if folder in path:
                 return category
         
         return 'Quick Notes'
     
     def _extract_tags(self, content: str, metadata: Dict) -> List[str]:
         """Extract tags from content and metadata"""
-        tags = set()
+        # From hashtags in content
+        tags = set(self.tag_pattern.findall(content))
         
         # From YAML front-matter
         if 'tags' in metadata:
@@ -293,35 +414,29 @@ class MarkdownParser:
             elif isinstance(meta_tags, str):
                 tags.update(tag.strip() for tag in meta_tags.split(','))
         
-        # From hashtags in content
-        hashtag_matches = self.tag_pattern.findall(content)
-        tags.update(hashtag_matches)
-        
-        return sorted(list(tags))
+        return sorted(tags)
     
     def _parse_wiki_links(self, content: str) -> List[WikiLink]:
         """Parse wiki-style links [[target|display]]"""
         wiki_links = []
+        # Matches arrive in order, so line numbers advance by the newlines since the previous one
+        line_number = 1
+        counted_to = 0
         
         for match in self.wiki_link_pattern.finditer(content):
-            link_text = match.group(1)
-            
-            # Handle pipe notation [[target|display]]
-            if '|' in link_text:
-                target, display = link_text.split('|', 1)
-                target = target.strip()
-                display = display.strip()
-            else:
-                target = link_text.strip()
-                display = target
+            # Pipe notation [[target|display]] is split by the pattern's second group
+            target = match.group(1).strip()
+            display = match.group(2)
+            display = display.strip() if display is not None else target
             
             # Find line number
-            line_number = content[:match.start()].count('\n') + 1
+            match_start, match_end = match.span()
+            line_number += content.count('\n', counted_to, match_start)
+            counted_to = match_start
             
-            # Extract context (surrounding text)
-            start = max(0, match.start() - 50)
-            end = min(len(content), match.end() + 50)
-            context = content[start:end].replace('\n', ' ')
+            # Extract context (surrounding text); slicing clamps the end, and
+            # replace hands back the slice itself when it holds no newline
+            context = content[max(0, match_start - 50):match_end + 50].replace('\n', ' ')
             
             wiki_links.append(WikiLink(
                 target=target,
@@ -334,24 +449,34 @@ class MarkdownParser:
     
     def _parse_relationships(self, content: str, source_title: str) -> List[Relationship]:
         """Parse typed relationships from content"""
+        source_id = self.note_id_mapping.get(source_title) or f"note_{source_title}"
+        return self._build_relationships(self._find_relationships(content), source_title, source_id)
+    
+    def _find_relationships(self, content: str) -> List[Tuple[str, str]]:
+        """(keyword, target title) for each keyword:: [[Target]] in content"""
+        # Most notes have no typed relationships; a substring check skips the regex for them
+        if '::' not in content:
+            return []
+        return self.relationship_pattern.findall(content)
+    
+    def _build_relationships(self, matches: List[Tuple[str, str]], source_title: str, source_id: str) -> List[Relationship]:
+        """Turn (keyword, target title) matches into relationships from source_id"""
         relationships = []
+        discovered_at = datetime.now().isoformat()
         
-        for relation_type, pattern in self.relationship_patterns.items():
-            matches = pattern.findall(content)
-            for target_title in matches:
-                target_id = self.note_id_mapping.get(target_title, f"note_{target_title}")
-                source_id = self.note_id_mapping.get(source_title, f"note_{source_title}")
-                
-                relationships.append(Relationship(
-                    source_id=source_id,
-                    target_id=target_id,
-                    relation_type=relation_type,
-                    metadata={
-                        'source_title': source_title,
-                        'target_title': target_title,
-                        'discovered_at': datetime.now().isoformat()
-                    }
-                ))
+        for keyword, target_title in matches:
+            target_id = self.note_id_mapping.get(target_title) or f"note_{target_title}"
+            
+            relationships.append(Relationship(
+                source_id=source_id,
+                target_id=target_id,
+                relation_type=self.relationship_keywords[keyword.lower()],
+                metadata={
+                    'source_title': source_title,
+                    'target_title': target_title,
+                    'discovered_at': discovered_at
+                }
+            ))
         
         return relationships
     
@@ -381,11 +506,25 @@ class MarkdownParser:
     
     def _update_link_cache(self, note: ParsedNote):
         """Update the link cache with note's links"""
+        # Typed relationships go first: a link keeps the metadata it was first added with,
+        # and the relationship's is more specific than the wiki-link it is written as
+        for rel in note.relationships:
+            self.link_cache.add_link(
+                source_id=rel.source_id,
+                target_id=rel.target_id,
+                metadata={
+                    'type': 'typed_relationship',
+                    'relation_type': rel.relation_type.value,
+                    **rel.metadata
+                }
+            )
+        
         # Add wiki-links to cache
+        source_id = note.id
         for link in note.wiki_links:
-            target_id = self.note_id_mapping.get(link.target, f"note_{link.target}")
+            target_id = self.note_id_mapping.get(link.target) or f"note_{link.target}"
             self.link_cache.add_link(
-                source_id=note.id,
+                source_id=source_id,
                 target_id=target_id,
                 metadata={
                     'type': 'wiki_link',
@@ -394,24 +533,12 @@ class MarkdownParser:
                     'context': link.context
                 }
             )
-        
-        # Add typed relationships to cache
-        for rel in note.relationships:
-            self.link_cache.add_link(
-                source_id=rel.source_id,
-                target_id=rel.target_id,
-                metadata={
-                    'type': 'typed_relationship',
-                    'relation_type': rel.relation_type.value,
-                    **rel.metadata
-                }
-            )
     
-    def get_backlinks(self, note_id: str) -> Set[str]:
+    def get_backlinks(self, note_id: str) -> AbstractSet[str]:
         """Get all notes that link to this note (O(1) lookup)"""
         return self.link_cache.get_incoming_links(note_id)
     
-    def get_outgoing_links(self, note_id: str) -> Set[str]:
+    def get_outgoing_links(self, note_id: str) -> AbstractSet[str]:
         """Get all notes that this note links to (O(1) lookup)"""
         return self.link_cache.get_outgoing_links(note_id)
     
@@ -462,9 +589,14 @@ class MarkdownParser:
                 elif rel.relation_type == RelationType.CHILD_OF:
                     metadata['parent'] = rel.metadata.get('target_title', rel.target_id)
             
-            # Write back to file
-            new_content = f"---\n{yaml.dump(metadata, default_flow_style=False)}---\n\n{body_content}"
-            note_path.write_text(new_content, encoding='utf-8')
+            # Write back to file; the front-matter is dumped before the file is truncated,
+            # and the body is written as is instead of being concatenated onto it
+            front_matter = yaml.dump(metadata, default_flow_style=False, Dumper=_YamlDumper)
+            with open(note_path, 'w', encoding='utf-8') as f:
+                f.write('---\n')
+                f.write(front_matter)
+                f.write('---\n\n')
+                f.write(body_content)
             
         except Exception as e:
             print(f"Error writing relationships to {note_path}: {e}")
@@ -472,6 +604,13 @@ class MarkdownParser:
 # Global parser instance
 _markdown_parser = None
 
+def _scan_note_file(file_path: Path) -> Any:
+    """parse_files worker: read and scan one note, returning the exception on failure"""
+    try:
+        return get_markdown_parser()._scan_note(file_path, MarkdownParser._read_note(file_path))
+    except Exception as e:
+        return e
+
 def get_markdown_parser() -> MarkdownParser:
     """Get the global markdown parser instance"""
     global _markdown_parser
@@ -2,14 +2,29 @@ import os
 import yaml
 import json
 from datetime import datetime
-from typing import Dict, List, Optional, Tuple
+from typing import Dict, FrozenSet, List, Optional, Set, Tuple
 from pathlib import Path
 import asyncio
 import aiofiles
 import re
-from dataclasses import dataclass
+import heapq
+import shutil
+import orjson
+from collections import Counter
+from dataclasses import dataclass, field
 
-from knowledge.hash_utils import calculate_content_hash, get_hash_tracker, HashTracker
+from knowledge.hash_utils import calculate_content_hash, get_hash_tracker, HashTracker, write_json_atomic
+
+# libyaml's loader and emitter when PyYAML was built with it, otherwise the pure-Python ones
+_YamlLoader = getattr(yaml, 'CSafeLoader', yaml.SafeLoader)
+_YamlDumper = getattr(yaml, 'CSafeDumper', yaml.SafeDumper)
+
+_TITLE_PATTERN = re.compile(r'^#\s+(.+)', re.MULTILINE)
+_WORD_PATTERN = re.compile(r'\b\w+\b')
+_WIKI_LINK_PATTERN = re.compile(r'\[\[([^\]]+)\]\]')
+# Filename sanitizing: drop punctuation, then collapse runs of dashes and whitespace
+_UNSAFE_FILENAME_CHARS = re.compile(r'[^\w\s-]')
+_DASHES_AND_SPACES = re.compile(r'[-\s]+')
 
 @dataclass
 class Note:
@@ -23,12 +38,33 @@ class Note:
     updated_at: datetime
     metadata: Dict
     content_hash: str = ""  # Add content hash field
+    # Lowercased content and its words, and the content string each was taken from
+    _lower: str = field(default="", init=False, repr=False, compare=False)
+    _lower_content: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+    _words: FrozenSet[str] = field(default=frozenset(), init=False, repr=False, compare=False)
+    _words_content: Optional[str] = field(default=None, init=False, repr=False, compare=False)
     
     def __post_init__(self):
         """Calculate content hash after initialization"""
         if not self.content_hash:
             self.content_hash = calculate_content_hash(self.content)
     
+    @property
+    def content_lower(self) -> str:
+        """Lowercased content, lowercased again only when the content changes"""
+        if self._lower_content is not self.content:
+            self._lower = self.content.lower()
+            self._lower_content = self.content
+        return self._lower
+    
+    @property
+    def word_set(self) -> FrozenSet[str]:
+        """Lowercased words of the content, tokenized again only when the content changes"""
+        if self._words_content is not self.content:
+            self._words = frozenset(_WORD_PATTERN.findall(self.content_lower))
+            self._words_content = self.content
+        return self._words
+    
     def to_dict(self) -> Dict:
         return {
             "path": self.path,
@@ -42,6 +78,21 @@ class Note:
             "content_hash": self.content_hash
         }
     
+    @classmethod
+    def from_dict(cls, data: Dict) -> 'Note':
+        """Rebuild a note from its to_dict form"""
+        return cls(
+            path=data["path"],
+            title=data["title"],
+            content=data["content"],
+            category=data["category"],
+            tags=data["tags"],
+            created_at=datetime.fromisoformat(data["created_at"]),
+            updated_at=datetime.fromisoformat(data["updated_at"]),
+            metadata=data["metadata"],
+            content_hash=data["content_hash"]
+        )
+    
     def has_content_changed(self, new_content: str) -> bool:
         """Check if content has changed by comparing hashes"""
         new_hash = calculate_content_hash(new_content)
@@ -67,6 +118,11 @@ class Note:
 class NotesManager:
     """Manages note files and directory structure with hash-based caching"""
     
+    # Note files read and parsed at once while scanning, bounding open file descriptors
+    SCAN_CONCURRENCY = 64
+    # Bumped whenever the scan cache's layout or the Note fields change
+    SCAN_CACHE_VERSION = 2
+    
     def __init__(self, notes_directory: str = None):
         self.notes_directory = Path(notes_directory or os.getenv("NOTES_DIRECTORY", "./notes"))
         self.notes_index: Dict[str, Note] = {}
@@ -82,6 +138,18 @@ class NotesManager:
             "Web Content": "web-content"  # Add web content category
         }
         self.initialized = False
+        # path -> (st_mtime_ns, st_size) of each note file as of the last scan
+        self._scan_stats: Dict[str, Tuple[int, int]] = {}
+        # Inverted index for find_related_notes: word -> paths of the notes containing it
+        self._postings: Dict[str, Set[str]] = {}
+        self._posted_words: Dict[str, FrozenSet[str]] = {}  # path -> words indexed for it
+        self._note_order: Dict[str, int] = {}  # path -> position in notes_index, for ranking ties
+    
+    @property
+    def scan_cache_file(self) -> Path:
+        """Notes from the last scan with the stat of their files, to skip unchanged files on startup"""
+        knowledge_base_path = os.getenv("KNOWLEDGE_BASE_PATH", "./.knowledge_base")
+        return Path(knowledge_base_path) / "notes_scan_cache.json"
     
     def get_obsidian_wiki_link_for_note(self, note_title: str, note_category: str = None) -> str:
         """
@@ -105,8 +173,8 @@ class NotesManager:
             if note_category and note_category in self.categories:
                 folder_name = self.categories[note_category]
                 # Sanitize title for filename
-                safe_title = re.sub(r'[^\w\s-]', '', note_title).strip()
-                safe_title = re.sub(r'[-\s]+', '-', safe_title)
+                safe_title = _UNSAFE_FILENAME_CHARS.sub('', note_title).strip()
+                safe_title = _DASHES_AND_SPACES.sub('-', safe_title)
                 return f"[[{folder_name}/{safe_title}]]"
             
             # Fallback to bare title
@@ -121,8 +189,6 @@ class NotesManager:
         Fix bare wiki-links in content to use proper paths for Obsidian compatibility.
         Converts [[Note Title]] to [[category/note-title]] where appropriate.
         """
-        import re
-        
         def replace_wiki_link(match):
             link_content = match.group(1).strip()
             
@@ -140,7 +206,7 @@ class NotesManager:
                 proper_link = self.get_obsidian_wiki_link_for_note(target)
                 if proper_link != f"[[{target}]]":
                     # Extract path from proper link
-                    path_match = re.match(r'\[\[([^\]]+)\]\]', proper_link)
+                    path_match = _WIKI_LINK_PATTERN.match(proper_link)
                     if path_match:
                         return f"[[{path_match.group(1)}|{display}]]"
                 
@@ -150,9 +216,7 @@ class NotesManager:
             proper_link = self.get_obsidian_wiki_link_for_note(link_content)
             return proper_link
         
-        # Pattern to match wiki-links
-        wiki_link_pattern = r'\[\[([^\]]+)\]\]'
-        return re.sub(wiki_link_pattern, replace_wiki_link, content)
+        return _WIKI_LINK_PATTERN.sub(replace_wiki_link, content)
     
     async def initialize(self):
         """Initialize the notes manager with hash tracking"""
@@ -219,46 +283,180 @@ This folder contains notes categorized as "{category}".
         processed_count = 0
         cached_count = 0
         
-        for root, dirs, files in os.walk(self.notes_directory):
-            for file in files:
-                if file.endswith(('.md', '.txt', '.markdown')):
-                    file_path = Path(root) / file
-                    try:
-                        # Read file content to check if it changed
-                        async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
-                            current_content = await f.read()
-                        
-                        # Check if content has changed using hash
-                        if not self.hash_tracker.has_content_changed(str(file_path), current_content):
-                            # Content hasn't changed, try to load from cache
-                            cached_note = self._load_note_from_cache(file_path, current_content)
-                            if cached_note:
-                                self.notes_index[str(file_path)] = cached_note
-                                cached_count += 1
-                                continue
-                        
-                        # Content has changed or no cache, parse the file
-                        note = await self._parse_note_file(file_path, current_content)
-                        if note:
-                            self.notes_index[str(file_path)] = note
-                            # Update hash cache
-                            self.hash_tracker.update_hash(
-                                str(file_path), 
-                                note.content_hash,
-                                {
-                                    "title": note.title,
-                                    "category": note.category,
-                                    "updated_at": note.updated_at.isoformat()
-                                }
-                            )
-                            processed_count += 1
-                    except Exception as e:
-                        print(f"Error processing note {file_path}: {e}")
+        entries = list(self._iter_note_entries())
+        scan_cache = await asyncio.to_thread(self._load_scan_cache)
+        
+        # Read and parse the files concurrently, a bounded number at a time
+        open_files = asyncio.BoundedSemaphore(self.SCAN_CONCURRENCY)
+        
+        async def scan(entry: os.DirEntry) -> Tuple[Optional[Note], bool]:
+            async with open_files:
+                return await self._scan_note_file(entry, scan_cache)
+        
+        results = await asyncio.gather(*(scan(entry) for entry in entries))
+        
+        # Index the notes in walk order
+        for note, cached in results:
+            if not note:
+                continue
+            file_path = note.path
+            self.notes_index[file_path] = note
+            if cached and self.hash_tracker.get_cached_hash(file_path) == note.content_hash:
+                cached_count += 1
+                continue
+            
+            # Update hash cache
+            self.hash_tracker.update_hash(
+                file_path, 
+                note.content_hash,
+                {
+                    "title": note.title,
+                    "category": note.category,
+                    "updated_at": note.updated_at.isoformat()
+                }
+            )
+            processed_count += 1
         
         if cached_count > 0:
             print(f"⚡ Used cache for {cached_count} unchanged notes, processed {processed_count} new/modified notes")
+        
+        # The index may have been cleared before a rescan, so rebuild the word index outright
+        self._rebuild_word_index()
+        
+        # Only notes found by this scan are written back, which drops deleted files
+        await asyncio.to_thread(self._save_scan_cache)
+    
+    def _rebuild_word_index(self):
+        """Rebuild the inverted word index from notes_index"""
+        self._postings = {}
+        self._posted_words = {}
+        self._note_order = {}
+        for note in self.notes_index.values():
+            self._index_note_words(note)
+    
+    def _index_note_words(self, note: Note):
+        """Post a note's words to the inverted index, replacing those of its previous content"""
+        path = note.path
+        words = note.word_set
+        old_words = self._posted_words.get(path, frozenset())
+        if words is old_words:
+            return
+        
+        for word in old_words - words:
+            paths = self._postings[word]
+            paths.discard(path)
+            if not paths:
+                del self._postings[word]
+        for word in words - old_words:
+            self._postings.setdefault(word, set()).add(path)
+        
+        self._posted_words[path] = words
+        self._note_order.setdefault(path, len(self._note_order))
+    
+    def _load_scan_cache(self) -> Dict[str, List]:
+        """Load path -> [st_mtime_ns, st_size, note dict] from the last scan"""
+        try:
+            with open(self.scan_cache_file, 'rb') as f:
+                data = orjson.loads(f.read())
+        except FileNotFoundError:
+            return {}
+        except (IOError, orjson.JSONDecodeError) as e:
+            print(f"Warning: Could not load notes scan cache: {e}")
+            return {}
+        
+        if data.get("version") != self.SCAN_CACHE_VERSION:
+            return {}
+        return data.get("notes", {})
+    
+    def _save_scan_cache(self):
+        """Save the scanned notes along with the stat of their files"""
+        notes = {}
+        for path, note in self.notes_index.items():
+            if path in self._scan_stats:
+                note_data = note.to_dict()
+                note_data["metadata"] = yaml.dump(note.metadata, Dumper=_YamlDumper, sort_keys=False) if note.metadata else ""
+                notes[path] = [*self._scan_stats[path], note_data]
+        try:
+            write_json_atomic(str(self.scan_cache_file), {"version": self.SCAN_CACHE_VERSION, "notes": notes})
+        except (IOError, TypeError) as e:
+            print(f"Warning: Could not save notes scan cache: {e}")
+    
+    def clear_scan_cache(self):
+        """Delete the scan cache so the next scan reads every note file"""
+        self._scan_stats.clear()
+        try:
+            os.remove(self.scan_cache_file)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"Warning: Could not remove notes scan cache: {e}")
     
-    def _load_note_from_cache(self, file_path: Path, content: str) -> Optional[Note]:
+    def _iter_note_entries(self):
+        """
+        Yield the directory entries of note files under the notes directory.
+        
+        Walks top-down in the same order as os.walk, but filters on the entry
+        name before anything is stat'ed and hands out the entries themselves,
+        which cache their stat for the scan.
+        """
+        stack = [str(self.notes_directory)]
+        while stack:
+            try:
+                with os.scandir(stack.pop()) as it:
+                    entries = list(it)
+            except OSError:
+                continue
+            
+            subdirectories = []
+            for entry in entries:
+                try:
+                    is_dir = entry.is_dir()
+                except OSError:
+                    is_dir = False
+                if is_dir:
+                    # Like os.walk, list symlinked directories but don't descend into them
+                    if not entry.is_symlink():
+                        subdirectories.append(entry.path)
+                elif entry.name.endswith(('.md', '.txt', '.markdown')):
+                    yield entry
+            
+            # Popped in listing order, each subtree after its parent's files
+            stack.extend(reversed(subdirectories))
+    
+    async def _scan_note_file(self, entry: os.DirEntry, scan_cache: Dict[str, List]) -> Tuple[Optional[Note], bool]:
+        """Read one note during the scan, returning it and whether it came from a cache"""
+        file_path = Path(entry.path)
+        try:
+            # Files whose modification time and size match the last scan aren't read at all
+            stat = entry.stat()
+            self._scan_stats[str(file_path)] = (stat.st_mtime_ns, stat.st_size)
+            # Files whose hash has since been cleared from the hash tracker are read again
+            cached = scan_cache.get(str(file_path))
+            if (cached and cached[0] == stat.st_mtime_ns and cached[1] == stat.st_size
+                    and self.hash_tracker.get_cached_hash(str(file_path)) == cached[2]["content_hash"]):
+                note_data = cached[2]
+                # Metadata is kept as YAML so dates and other YAML types come back as they were parsed
+                note_data["metadata"] = yaml.load(note_data["metadata"], Loader=_YamlLoader) or {}
+                return Note.from_dict(note_data), True
+            
+            # Read file content to check if it changed
+            async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
+                current_content = await f.read()
+            
+            # Check if content has changed using hash
+            if not self.hash_tracker.has_content_changed(str(file_path), current_content):
+                # Content hasn't changed, try to load from cache
+                cached_note = self._load_note_from_cache(file_path, current_content, stat)
+                if cached_note:
+                    return cached_note, True
+            
+            # Content has changed or no cache, parse the file
+            return await self._parse_note_file(file_path, current_content, stat), False
+        except Exception as e:
+            print(f"Error processing note {file_path}: {e}")
+            return None, False
+    
+    def _load_note_from_cache(self, file_path: Path, content: str, stat: os.stat_result = None) -> Optional[Note]:
         """Load note from cached hash data if available"""
         try:
             cached_hash = self.hash_tracker.get_cached_hash(str(file_path))
@@ -266,7 +464,7 @@ This folder contains notes categorized as "{category}".
                 return None
             
             # Get file timestamps
-            stat = file_path.stat()
+            stat = stat or file_path.stat()
             created_at = datetime.fromtimestamp(stat.st_ctime)
             updated_at = datetime.fromtimestamp(stat.st_mtime)
             
@@ -298,28 +496,29 @@ This folder contains notes categorized as "{category}".
             print(f"Error loading cached note {file_path}: {e}")
             return None
     
-    async def _parse_note_file(self, file_path: Path, content: str = None) -> Optional[Note]:
+    async def _parse_note_file(self, file_path: Path, content: str = None, stat: os.stat_result = None) -> Optional[Note]:
         """Parse a note file and extract metadata"""
         try:
             if content is None:
                 async with aiofiles.open(file_path, 'r', encoding='utf-8') as f:
                     content = await f.read()
             
-            # Extract frontmatter if present
+            # Extract frontmatter if present, slicing at the closing delimiter
+            # rather than splitting the whole note
             metadata = {}
             if content.startswith('---'):
-                parts = content.split('---', 2)
-                if len(parts) >= 3:
+                end = content.find('---', 3)
+                if end >= 0:
                     try:
-                        metadata = yaml.safe_load(parts[1])
-                        content = parts[2].strip()
+                        metadata = yaml.load(content[3:end], Loader=_YamlLoader)
+                        content = content[end + 3:].strip()
                     except:
                         pass
             
             # Extract title (first # heading or filename)
             title = metadata.get('title', '')
             if not title:
-                title_match = re.search(r'^#\s+(.+)', content, re.MULTILINE)
+                title_match = _TITLE_PATTERN.search(content)
                 if title_match:
                     title = title_match.group(1).strip()
                 else:
@@ -334,7 +533,7 @@ This folder contains notes categorized as "{category}".
                 tags = [tag.strip() for tag in tags.split(',')]
             
             # Get file timestamps
-            stat = file_path.stat()
+            stat = stat or file_path.stat()
             created_at = datetime.fromtimestamp(stat.st_ctime)
             updated_at = datetime.fromtimestamp(stat.st_mtime)
             
@@ -376,17 +575,23 @@ This folder contains notes categorized as "{category}".
         category_path = self.notes_directory / folder_name
         
         # Generate filename
-        safe_title = re.sub(r'[^\w\s-]', '', title).strip()
-        safe_title = re.sub(r'[-\s]+', '-', safe_title)
+        safe_title = _UNSAFE_FILENAME_CHARS.sub('', title).strip()
+        safe_title = _DASHES_AND_SPACES.sub('-', safe_title)
         filename = f"{safe_title}.md"
         
-        # Ensure unique filename
+        # Ensure unique filename: list the folder once instead of stat'ing each candidate.
+        # Names are compared casefolded, so a case-insensitive filesystem can't map
+        # a "free" name onto an existing note
+        try:
+            with os.scandir(category_path) as it:
+                taken = {entry.name.casefold() for entry in it}
+        except FileNotFoundError:
+            taken = set()
         counter = 1
-        file_path = category_path / filename
-        while file_path.exists():
-            name_part = safe_title
-            file_path = category_path / f"{name_part}-{counter}.md"
+        while filename.casefold() in taken:
+            filename = f"{safe_title}-{counter}.md"
             counter += 1
+        file_path = category_path / filename
         
         # Create frontmatter
         now = datetime.now()
@@ -399,14 +604,16 @@ This folder contains notes categorized as "{category}".
         }
         
         # Create note content with frontmatter
-        note_content = f"---\n{yaml.dump(frontmatter, default_flow_style=False)}---\n\n# {title}\n\n{content}"
+        note_content = ''.join([
+            '---\n', yaml.dump(frontmatter, default_flow_style=False, Dumper=_YamlDumper), '---\n\n',
+            '# ', title, '\n\n', content,
+        ])
         
         # Fix wiki-links in content
         note_content = self._fix_wiki_links_in_content(note_content)
         
         # Write file
-        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-            await f.write(note_content)
+        await self._write_note_file(file_path, note_content)
         
         # Create note object
         note = Note(
@@ -423,6 +630,7 @@ This folder contains notes categorized as "{category}".
         
         # Add to index
         self.notes_index[str(file_path)] = note
+        self._index_note_words(note)
         
         # Update hash cache
         self.hash_tracker.update_hash(
@@ -451,36 +659,42 @@ This folder contains notes categorized as "{category}".
             current_content = await f.read()
         
         # Check if we actually need to update (avoid unnecessary writes)
-        new_content_section = f"\n\n## Update - {datetime.now().strftime('%Y-%m-%d %H:%M')}\n\n{additional_content}"
+        now = datetime.now()
+        new_content_section = f"\n\n## Update - {now.strftime('%Y-%m-%d %H:%M')}\n\n{additional_content}"
         if new_content_section.strip() in current_content:
             print(f"⚠️  Content already exists in note: {note.title}")
             return note
         
         # Add new content
-        updated_content = current_content + new_content_section
+        updated_content = None
         
-        # Update frontmatter
+        # Update frontmatter, sliced at its closing delimiter
         if current_content.startswith('---'):
-            parts = current_content.split('---', 2)
-            if len(parts) >= 3:
+            end = current_content.find('---', 3)
+            if end >= 0:
                 try:
-                    metadata = yaml.safe_load(parts[1])
-                    metadata['updated'] = datetime.now().isoformat()
-                    updated_content = f"---\n{yaml.dump(metadata, default_flow_style=False)}---\n\n{parts[2].strip()}{new_content_section}"
+                    metadata = yaml.load(current_content[3:end], Loader=_YamlLoader)
+                    metadata['updated'] = now.isoformat()
+                    updated_content = ''.join([
+                        '---\n', yaml.dump(metadata, default_flow_style=False, Dumper=_YamlDumper), '---\n\n',
+                        current_content[end + 3:].strip(), new_content_section,
+                    ])
                 except:
                     pass
+        if updated_content is None:
+            updated_content = current_content + new_content_section
         
         # Fix wiki-links in content
         updated_content = self._fix_wiki_links_in_content(updated_content)
         
         # Write updated content
-        async with aiofiles.open(file_path, 'w', encoding='utf-8') as f:
-            await f.write(updated_content)
+        await self._write_note_file(file_path, updated_content)
         
         # Update note object
         note.content = note.content + new_content_section
-        note.updated_at = datetime.now()
+        note.updated_at = now
         note.update_content_hash()  # Recalculate hash
+        self._index_note_words(note)
         
         # Update hash cache
         self.hash_tracker.update_hash(
@@ -496,27 +710,75 @@ This folder contains notes categorized as "{category}".
         print(f"✏️  Updated note: {note.title}")
         return note
     
+    async def _write_note_file(self, file_path: Path, content: str):
+        """
+        Write a note through a temp file swapped into place
+        
+        Readers (Obsidian, the file watcher, a crash mid-write) only ever see the
+        old or the new note, never a truncated one. The temp file is a dotfile
+        without a note extension, so scans and the watcher ignore it.
+        """
+        target_path, tmp_path = await asyncio.to_thread(self._create_temp_note_file, file_path)
+        try:
+            async with aiofiles.open(tmp_path, 'w', encoding='utf-8') as f:
+                await f.write(content)
+            await asyncio.to_thread(os.replace, tmp_path, target_path)
+        except BaseException:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+            raise
+    
+    @staticmethod
+    def _create_temp_note_file(file_path: Path) -> Tuple[str, str]:
+        """
+        Create a uniquely named temp file next to a note, returning the note's real path and the temp path
+        
+        The replace goes to the symlink's target so a symlinked note stays a
+        symlink, and the temp file takes the note's permissions.
+        """
+        target_path = os.path.realpath(file_path)
+        directory, name = os.path.split(target_path)
+        while True:
+            tmp_path = os.path.join(directory, f".{name}.{os.urandom(6).hex()}.tmp")
+            try:
+                # Created with the mode open() gives a new file, so the kernel applies the umask
+                fd = os.open(tmp_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY, 0o666)
+                break
+            except FileExistsError:
+                continue
+        os.close(fd)
+        try:
+            if os.path.exists(target_path):
+                shutil.copymode(target_path, tmp_path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+        return target_path, tmp_path
+    
     async def find_related_notes(self, content: str, category: str = None, limit: int = 5) -> List[Note]:
         """Find notes related to the given content"""
         # Simple keyword matching for now - could be enhanced with embeddings
         content_lower = content.lower()
-        keywords = set(re.findall(r'\b\w+\b', content_lower))
+        keywords = frozenset(_WORD_PATTERN.findall(content_lower))
+        
+        # Score based on keyword overlap: a note's score is the number of
+        # keyword postings it appears in, so notes sharing no word are never visited
+        overlaps = Counter()
+        for word in keywords:
+            overlaps.update(self._postings.get(word, ()))
         
         scored_notes = []
-        for note in self.notes_index.values():
-            if category and note.category != category:
+        for path, overlap in overlaps.items():
+            note = self.notes_index.get(path)
+            if note is None or (category and note.category != category):
                 continue
-            
-            # Score based on keyword overlap
-            note_keywords = set(re.findall(r'\b\w+\b', note.content.lower()))
-            overlap = len(keywords.intersection(note_keywords))
-            
-            if overlap > 0:
-                scored_notes.append((note, overlap))
+            scored_notes.append((note, overlap))
         
-        # Sort by score and return top matches
-        scored_notes.sort(key=lambda x: x[1], reverse=True)
-        return [note for note, score in scored_notes[:limit]]
+        # Top matches by score, ties in index order
+        top_notes = heapq.nsmallest(limit, scored_notes, key=lambda x: (-x[1], self._note_order[x[0].path]))
+        return [note for note, score in top_notes]
     
     async def get_notes_by_category(self, category: str) -> List[Note]:
         """Get all notes in a specific category"""
@@ -533,7 +795,7 @@ This folder contains notes categorized as "{category}".
         
         for note in self.notes_index.values():
             if (query_lower in note.title.lower() or 
-                query_lower in note.content.lower() or
+                query_lower in note.content_lower or
                 any(query_lower in tag.lower() for tag in note.tags)):
                 matching_notes.append(note)
         
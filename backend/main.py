@@ -11,6 +11,7 @@ from dotenv import load_dotenv
 import os
 
 from agent.knowledge_agent import KnowledgeAgent
+from agent.knowledge_tools import _knowledge_tools_manager
 from models.chat_models import ChatMessage, ChatRequest, ChatResponse
 from knowledge.embedding_service import create_embedding_service
 
@@ -47,6 +48,11 @@ async def startup_event():
     """Initialize the knowledge agent on startup"""
     await knowledge_agent.initialize()
 
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Write out graph changes the periodic flush hasn't saved yet"""
+    await knowledge_agent.enhanced_graph.flush()
+
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
@@ -61,7 +67,8 @@ async def health_check():
 async def get_embedding_config():
     """Get current embedding configuration"""
     try:
-        embedding_service = create_embedding_service()
+        # Reuse the graph's service; creating one loads the sentence-transformer model
+        embedding_service = knowledge_agent.enhanced_graph.embedding_service or create_embedding_service()
         provider_info = embedding_service.get_provider_info()
         return {
             "embedding_provider": provider_info,
@@ -570,6 +577,7 @@ async def clear_cache(confirm: bool = False):
         
         # Clear the cache
         hash_tracker.clear_cache()
+        _knowledge_tools_manager.notes_manager.clear_scan_cache()
         
         return {
             "success": True,
@@ -602,6 +610,7 @@ async def rebuild_cache():
         # Clear existing cache
         old_stats = hash_tracker.get_cache_stats()
         hash_tracker.clear_cache()
+        _knowledge_tools_manager.notes_manager.clear_scan_cache()
         
         # Reinitialize enhanced graph to rebuild cache
         await knowledge_agent.enhanced_graph.initialize()
@@ -55,7 +55,7 @@ async def test_directory_structure():
         
         # Test 3: Check knowledge base files
         print("\n3. Testing knowledge base structure...")
-        expected_kb_files = ["hash_cache.json", "note_mapping.json"]
+        expected_kb_files = ["hash_cache", "note_mapping.json"]
         for kb_file in expected_kb_files:
             kb_file_path = knowledge_base_dir / kb_file
             if kb_file_path.exists():
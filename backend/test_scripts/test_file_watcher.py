@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test that the file watcher maps changed files onto the graph's note keys
+"""
+
+import os
+import sys
+import shutil
+import asyncio
+import tempfile
+from pathlib import Path
+from datetime import datetime
+
+# Add the backend directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from knowledge.file_watcher import KnowledgeGraphWatcher
+from knowledge.enhanced_knowledge_graph import EnhancedKnowledgeGraph
+
+
+async def test_relative_notes_directory():
+    """Paths reported by watchfiles resolve to the keys the graph scan uses"""
+    print("🧪 Testing watcher paths with a relative notes directory...")
+    
+    test_dir = tempfile.mkdtemp(prefix="watcher_test_")
+    original_cwd = os.getcwd()
+    
+    try:
+        os.chdir(test_dir)
+        notes_dir = Path("./notes")
+        (notes_dir / "ideas").mkdir(parents=True)
+        (notes_dir / "ideas" / "a.md").write_text("# A\n")
+        
+        watcher = KnowledgeGraphWatcher(notes_directory="./notes")
+        
+        # The graph scan keys notes by the configured directory joined with rglob's relative path
+        graph_keys = {str(path) for path in Path(notes_dir).rglob("*.md")}
+        assert graph_keys == {os.path.join("notes", "ideas", "a.md")}, f"Unexpected scan keys: {graph_keys}"
+        
+        # watchfiles reports absolute paths that still contain the ./ of the configured directory
+        reported = os.path.join(os.getcwd(), ".", "notes", "ideas", "a.md")
+        assert watcher._graph_path(reported) in graph_keys, f"{reported} mapped to {watcher._graph_path(reported)}"
+        print(f"✅ Modified file maps onto its graph key: {watcher._graph_path(reported)}")
+        
+        # Deleted files no longer exist on disk but must map the same way
+        (notes_dir / "ideas" / "a.md").unlink()
+        assert watcher._graph_path(reported) == os.path.join("notes", "ideas", "a.md"), "Deleted file should map onto its graph key"
+        print("✅ Deleted file maps onto its graph key")
+    
+    finally:
+        os.chdir(original_cwd)
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+
+async def test_unchanged_file_after_index_clear():
+    """A file whose node is gone is parsed again even when its bytes haven't changed"""
+    print("\n🧪 Testing unchanged files after the graph indexes are cleared...")
+    
+    test_dir = Path(tempfile.mkdtemp(prefix="watcher_test_"))
+    
+    try:
+        note_path = test_dir / "a.md"
+        note_path.write_text("# A\n\nLinks to [[B]]\n")
+        
+        watcher = KnowledgeGraphWatcher(notes_directory=str(test_dir))
+        watcher.graph = EnhancedKnowledgeGraph()
+        watcher.graph.notes_directory = str(test_dir)
+        
+        await watcher._process_file_change(str(note_path), 'created')
+        assert str(note_path) in watcher.graph.path_to_id, "Created file should get a node"
+        print("✅ Created file gets a node")
+        
+        # What _clean_all_storage does during a forced rebuild, while the watcher keeps running
+        watcher.graph._clear_indexes()
+        await watcher._process_file_change(str(note_path), 'modified')
+        node_id = watcher.graph.path_to_id.get(str(note_path))
+        assert node_id in watcher.graph.nodes_by_id, "Unchanged file should get its node back after a clear"
+        print("✅ Unchanged file gets its node back after the indexes were cleared")
+    
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+
+async def main():
+    """Run all file watcher tests"""
+    print("🚀 File Watcher Tests")
+    print(f"⏰ Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+    
+    await test_relative_notes_directory()
+    await test_unchanged_file_after_index_clear()
+    
+    print("\n🎉 All tests completed!")
+    print(f"⏰ Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
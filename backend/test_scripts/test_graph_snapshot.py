@@ -0,0 +1,126 @@
+#!/usr/bin/env python3
+"""
+Test the sharded knowledge graph snapshot: legacy migration, save, reload and removal
+"""
+
+import os
+import sys
+import json
+import shutil
+import asyncio
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from dataclasses import asdict
+
+# Add the backend directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from knowledge.enhanced_knowledge_graph import EnhancedKnowledgeGraph, GraphNode, GraphEdge
+from knowledge.hash_utils import shard_of
+
+
+def make_node(node_id: str, title: str) -> GraphNode:
+    """A graph node as a parsed note would produce it"""
+    return GraphNode(
+        id=node_id,
+        title=title,
+        content=f"# {title}\n\nSome content",
+        category="Research",
+        tags=["test"],
+        metadata={"source": "test"},
+        content_hash=f"hash-{node_id}",
+        created_at="2024-01-01T00:00:00",
+        updated_at="2024-01-01T00:00:00",
+        file_path=f"notes/{title}.md"
+    )
+
+
+def distinct_shard_ids(count: int) -> list:
+    """Node IDs that all fall into different snapshot shards"""
+    ids, shards = [], set()
+    candidate = 0
+    while len(ids) < count:
+        node_id = f"node-{candidate}"
+        if shard_of(node_id) not in shards:
+            ids.append(node_id)
+            shards.add(shard_of(node_id))
+        candidate += 1
+    return ids
+
+
+def snapshot(graph: EnhancedKnowledgeGraph):
+    """Nodes and edges of a graph in comparable form"""
+    nodes = {node_id: asdict(node) for node_id, node in graph.nodes_by_id.items()}
+    edges = {edge_id: asdict(edge) for edge_id, edge in graph.edges_by_id.items()}
+    return nodes, edges
+
+
+async def test_legacy_snapshot_round_trip():
+    """A single-file snapshot loads, migrates into shards on save and reloads unchanged"""
+    print("🧪 Testing graph snapshot migration and round trip...")
+    
+    kb_dir = tempfile.mkdtemp(prefix="graph_snapshot_test_")
+    try:
+        a_id, b_id, c_id = distinct_shard_ids(3)
+        nodes = [make_node(a_id, "A"), make_node(b_id, "B"), make_node(c_id, "C")]
+        edges = [
+            GraphEdge(source_id=a_id, target_id=b_id, relation_type="wiki_link", metadata={"target": "B"}, created_at="2024-01-01T00:00:00"),
+            GraphEdge(source_id=b_id, target_id=c_id, relation_type="wiki_link", metadata={"target": "C"}, created_at="2024-01-01T00:00:00"),
+        ]
+        
+        # Write the single-file format used before sharding
+        graph_file = os.path.join(kb_dir, "enhanced_graph.json")
+        with open(graph_file, 'w') as f:
+            json.dump({'nodes': [asdict(node) for node in nodes], 'edges': [asdict(edge) for edge in edges]}, f)
+        
+        graph = EnhancedKnowledgeGraph(knowledge_base_path=kb_dir)
+        await graph._load_graph()
+        assert set(graph.nodes_by_id) == {a_id, b_id, c_id}, "Legacy nodes should load"
+        assert len(graph.edges_by_id) == 2, "Legacy edges should load"
+        assert graph.dirty, "A legacy snapshot should be marked for migration"
+        print("✅ Legacy snapshot loaded")
+        
+        await graph._save_graph()
+        assert not os.path.exists(graph_file), "Legacy file should be removed once migrated"
+        expected_shards = {shard_of(node_id) + ".json" for node_id in (a_id, b_id, c_id)}
+        assert set(os.listdir(graph.graph_dir)) == expected_shards, "Each node and edge should land in its shard"
+        print("✅ Legacy snapshot migrated into shards")
+        
+        reloaded = EnhancedKnowledgeGraph(knowledge_base_path=kb_dir)
+        await reloaded._load_graph()
+        assert snapshot(reloaded) == snapshot(graph), "Shards should reload to the same graph"
+        assert not reloaded.dirty, "A sharded snapshot needs no migration"
+        print("✅ Shards reload to the same graph")
+        
+        # Removing C empties its shard and drops the B -> C edge from B's shard
+        await reloaded._remove_node(c_id)
+        await reloaded._save_graph()
+        assert shard_of(c_id) + ".json" not in os.listdir(reloaded.graph_dir), "Empty shard should be removed"
+        
+        after_removal = EnhancedKnowledgeGraph(knowledge_base_path=kb_dir)
+        await after_removal._load_graph()
+        assert set(after_removal.nodes_by_id) == {a_id, b_id}, "Removed node should stay removed"
+        assert [(edge.source_id, edge.target_id) for edge in after_removal.edges_by_id.values()] == [(a_id, b_id)], "Edges into the removed node should be gone"
+        print("✅ Removed node and its emptied shard stay removed after reload")
+    
+    finally:
+        shutil.rmtree(kb_dir, ignore_errors=True)
+    
+    return True
+
+
+async def main():
+    """Run all graph snapshot tests"""
+    print("🚀 Graph Snapshot Tests")
+    print(f"⏰ Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+    
+    await test_legacy_snapshot_round_trip()
+    
+    print("\n🎉 All tests completed!")
+    print(f"⏰ Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -4,16 +4,19 @@ Test script for the hash-based caching system in the knowledge management agent
 """
 
 import asyncio
+import os
 import sys
 import time
 import json
+import shutil
+import tempfile
 from pathlib import Path
 
 # Add the backend directory to the Python path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from agent.knowledge_agent import KnowledgeAgent
-from knowledge.hash_utils import get_hash_tracker, calculate_content_hash
+from knowledge.hash_utils import get_hash_tracker, calculate_content_hash, HashTracker, shard_of
 
 async def test_hash_utilities():
     """Test the basic hash utility functions"""
@@ -71,6 +74,117 @@ async def test_hash_tracker():
     
     return True
 
+async def test_legacy_cache_migration():
+    """Test loading a single-file hash cache and migrating it into shards"""
+    print("\n🧪 Testing legacy hash cache migration...")
+    
+    test_dir = tempfile.mkdtemp(prefix="hash_test_")
+    try:
+        cache_file = os.path.join(test_dir, "hash_cache.json")
+        legacy = {
+            f"notes/note-{i}.md": {"hash": f"hash-{i}", "updated_at": "2024-01-01T00:00:00", "metadata": {}}
+            for i in range(50)
+        }
+        with open(cache_file, 'w') as f:
+            json.dump(legacy, f)
+        with open(os.path.join(test_dir, "note_mapping.json"), 'w') as f:
+            json.dump({"notes/note-0.md": "node-0"}, f)
+        
+        tracker = HashTracker(cache_file)
+        assert tracker.hash_cache == legacy, "Legacy entries should load"
+        assert tracker.get_knowledge_node_id("notes/note-0.md") == "node-0", "Legacy mapping should load"
+        
+        tracker.compact()
+        assert not os.path.exists(cache_file), "Legacy file should be removed once migrated"
+        shard_files = set(os.listdir(tracker.cache_dir))
+        assert shard_files == {shard_of(identifier) + ".json" for identifier in legacy}, "Each entry should land in its shard"
+        
+        reloaded = HashTracker(cache_file)
+        assert reloaded.hash_cache == legacy, "Shards should reload to the same cache"
+        assert reloaded.get_knowledge_node_id("notes/note-0.md") == "node-0", "Mapping should survive migration"
+        
+        # Removing the only entry of a shard removes the shard file
+        shard_sizes = {}
+        for identifier in legacy:
+            shard_sizes[shard_of(identifier)] = shard_sizes.get(shard_of(identifier), 0) + 1
+        lonely = next(identifier for identifier in legacy if shard_sizes[shard_of(identifier)] == 1)
+        reloaded.cleanup_stale_entries(set(legacy) - {lonely})
+        assert not os.path.exists(os.path.join(reloaded.cache_dir, shard_of(lonely) + ".json")), "Empty shard should be removed"
+        assert lonely not in HashTracker(cache_file).hash_cache, "Stale entry should stay removed after reload"
+        
+        # Clearing empties every shard
+        reloaded.clear_cache()
+        cleared = HashTracker(cache_file)
+        assert not cleared.hash_cache and not cleared.note_to_node_mapping, "Cleared cache should reload empty"
+        
+        print("✅ Legacy cache migrated into shards and reloads correctly")
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+async def test_log_replay_with_torn_line():
+    """Test replaying the update log when its last line was cut off mid-write"""
+    print("\n🧪 Testing update log replay after a torn write...")
+    
+    test_dir = tempfile.mkdtemp(prefix="hash_test_")
+    try:
+        cache_file = os.path.join(test_dir, "hash_cache.json")
+        tracker = HashTracker(cache_file)
+        tracker.update_hash("a.md", "hash-a")
+        tracker.update_hash("b.md", "hash-b")
+        tracker.update_hash("a.md", "hash-a2")
+        tracker.set_note_mapping("a.md", "node-a")
+        tracker.set_note_mapping("b.md", "node-b")
+        tracker.remove_note_mapping("b.md")
+        assert os.path.exists(tracker.log_file), "Updates should be logged, not snapshotted"
+        
+        # A crash in the middle of an append leaves a partial last line
+        with open(tracker.log_file, 'ab') as f:
+            f.write(b'{"op": "set", "id": "c.md", "entry": {"ha')
+        
+        reloaded = HashTracker(cache_file)
+        assert reloaded.get_cached_hash("a.md") == "hash-a2", "Latest logged hash should win"
+        assert reloaded.get_cached_hash("b.md") == "hash-b", "Earlier logged hashes should replay"
+        assert reloaded.get_cached_hash("c.md") is None, "Torn entry should be skipped"
+        assert reloaded.note_to_node_mapping == {"a.md": "node-a"}, "Map and unmap entries should replay in order"
+        
+        print("✅ Update log replays up to the torn line")
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
+async def test_failed_snapshot_keeps_log():
+    """Test that compaction keeps the update log when a snapshot can't be written"""
+    print("\n🧪 Testing compaction when the hash cache snapshot fails...")
+    
+    test_dir = tempfile.mkdtemp(prefix="hash_test_")
+    try:
+        cache_file = os.path.join(test_dir, "hash_cache.json")
+        tracker = HashTracker(cache_file)
+        tracker.update_hash("a.md", "hash-a")
+        
+        # A plain file where the shard directory belongs makes the shard writes fail
+        with open(tracker.cache_dir, 'w') as f:
+            f.write("not a directory")
+        tracker.compact()
+        assert os.path.exists(tracker.log_file), "Log should be kept when the snapshot fails"
+        
+        os.remove(tracker.cache_dir)
+        reloaded = HashTracker(cache_file)
+        assert reloaded.get_cached_hash("a.md") == "hash-a", "Update should survive through the kept log"
+        
+        reloaded.compact()
+        assert not os.path.exists(reloaded.log_file), "Log should be truncated once the snapshot succeeds"
+        assert HashTracker(cache_file).get_cached_hash("a.md") == "hash-a", "Update should be in the shards"
+        
+        print("✅ Failed snapshot keeps the log for the next load")
+    finally:
+        shutil.rmtree(test_dir, ignore_errors=True)
+    
+    return True
+
 async def test_agent_caching():
     """Test the agent's caching behavior"""
     print("\n🧪 Testing agent caching behavior...")
@@ -240,6 +354,9 @@ async def main():
     tests = [
         test_hash_utilities,
         test_hash_tracker,
+        test_legacy_cache_migration,
+        test_log_replay_with_torn_line,
+        test_failed_snapshot_keeps_log,
         test_agent_caching,
         test_note_creation_caching,
         test_content_update_detection,
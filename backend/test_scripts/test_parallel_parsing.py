@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""
+Test that parsing a vault in worker processes matches a serial parse
+"""
+
+import sys
+import random
+import shutil
+import asyncio
+import tempfile
+from pathlib import Path
+from datetime import datetime
+from dataclasses import asdict
+
+# Add the backend directory to the path
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+from knowledge.markdown_parser import MarkdownParser
+
+
+def create_random_vault(vault_dir: Path, note_count: int = 90, seed: int = 0):
+    """Write notes with front-matter, tags, wiki-links and typed relationships"""
+    rng = random.Random(seed)
+    for i in range(note_count):
+        words = []
+        for _ in range(30):
+            target = f"Note {rng.randrange(note_count)}"
+            words.append(rng.choice([
+                f"[[{target}]]", f"[[{target}|alias]]", f"parent:: [[{target}]]",
+                f"child:: [[{target}]]", "#idea", "#project/alpha", "word", "\n"
+            ]))
+        body = f"# Note {i}\n\n" + " ".join(words)
+        if i % 7 == 0:
+            body = "---\ntags: [research, draft]\ncategory: Research\ncreated: 2024-01-01\n---\n" + body
+        folder = vault_dir / rng.choice(["ideas", "research", "projects"])
+        folder.mkdir(exist_ok=True)
+        (folder / f"note-{i}.md").write_text(body, encoding="utf-8")
+    
+    # A note that cannot be decoded must be reported the same way by both paths
+    (vault_dir / "ideas" / "broken.md").write_bytes(b"\xff\xfe\x00")
+
+
+def comparable(parsed_note) -> dict:
+    """A parsed note as a dict, without the wall-clock discovery timestamps"""
+    data = asdict(parsed_note)
+    for relationship in data["relationships"]:
+        relationship["metadata"].pop("discovered_at", None)
+    return data
+
+
+async def test_parallel_parse_matches_serial():
+    """Worker-process parsing produces the same notes, IDs and link cache as a serial parse"""
+    print("🧪 Testing parallel parsing against a serial parse...")
+    
+    vault_dir = Path(tempfile.mkdtemp(prefix="parse_test_"))
+    try:
+        create_random_vault(vault_dir)
+        file_paths = sorted(vault_dir.rglob("*.md"))
+        assert len(file_paths) >= MarkdownParser.PARALLEL_PARSE_MIN_FILES, "Vault too small to use worker processes"
+        
+        # Serial reference: one parse_file call per note, in order
+        serial_parser = MarkdownParser()
+        serial = []
+        for file_path in file_paths:
+            try:
+                serial.append((file_path, serial_parser.parse_file(file_path)))
+            except Exception:
+                pass
+        
+        parallel_parser = MarkdownParser()
+        parallel = await parallel_parser.parse_files_async(file_paths)
+        
+        assert [path for path, _ in parallel] == [path for path, _ in serial], "Parsed different files"
+        for (file_path, expected), (_, actual) in zip(serial, parallel):
+            assert comparable(actual) == comparable(expected), f"Parsed differently: {file_path.name}"
+        print(f"✅ {len(parallel)} notes parsed identically")
+        
+        assert parallel_parser.note_id_mapping == serial_parser.note_id_mapping, "Note ID mapping differs"
+        assert parallel_parser.link_cache.outgoing_links == serial_parser.link_cache.outgoing_links, "Outgoing links differ"
+        assert parallel_parser.link_cache.incoming_links == serial_parser.link_cache.incoming_links, "Incoming links differ"
+        print("✅ Note IDs and link cache match")
+    
+    finally:
+        shutil.rmtree(vault_dir, ignore_errors=True)
+    
+    return True
+
+
+async def main():
+    """Run all parsing tests"""
+    print("🚀 Parallel Parsing Tests")
+    print(f"⏰ Started at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print("=" * 60)
+    
+    await test_parallel_parse_matches_serial()
+    
+    print("\n🎉 All tests completed!")
+    print(f"⏰ Finished at: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())